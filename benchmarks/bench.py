@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Benchmark triggerd against synthetic event trees"""
+
+import logging
+
+__program__ = 'bench'
+
+# code executed by each scenario (in a fresh interpreter)
+#   {tree}   : event tree (a copy, as triggered events are updated)
+#   {config} : trigger config file
+SCENARIOS = {
+    'serial': "triggerd.main(['--no-cache', '--no-state', '--no-parallel', "
+              "'-f', {config!r}, {tree!r}])",
+    'parallel': "triggerd.main(['--no-cache', '--no-state', '--parallel', "
+                "'-f', {config!r}, {tree!r}])",
+    'verify': "triggerd.main(['--no-cache', '--no-state', '--verify', "
+              "'-f', {config!r}, {tree!r}])",
+    'generate_paths': "triggerd.generate_paths([{tree!r}])",
+    'parse': "[triggerd._parse(p) "
+             "for p in triggerd.generate_paths([{tree!r}])]",
+    'configobj': "import configobj; "
+                 "[configobj.ConfigObj(p, interpolation=False, "
+                 "list_values=False) "
+                 "for p in triggerd.generate_paths([{tree!r}])]"
+    }
+
+TEMPLATE = """\
+import json, sys, time
+sys.path.insert(0, {root!r})
+import triggerd
+started = time.perf_counter()
+try:
+    {code}
+except SystemExit:
+    pass
+print(json.dumps({{'elapsed': time.perf_counter() - started}}))
+"""
+
+
+def measure(code, root, environment):
+    """
+    Execute `code` in a fresh interpreter and return its wall time, time
+    spent in `code`, peak RSS and the number of processes spawned.
+    """
+
+    import json
+    import os
+    import subprocess
+    import sys
+    import time
+
+    spawned = _processes()
+    started = time.perf_counter()
+
+    process = subprocess.Popen(
+        [sys.executable, '-c', TEMPLATE.format(code=code, root=root)],
+        env=environment,
+        stderr=subprocess.DEVNULL,
+        stdout=subprocess.PIPE)
+    output = process.stdout.read()
+    process.stdout.close()
+
+    # await the child with wait4 for its own resource usage
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status) \
+        if hasattr(os, 'waitstatus_to_exitcode') else status
+
+    wall = time.perf_counter() - started
+    spawns = _processes() - spawned
+
+    try:
+        elapsed = json.loads(output.decode().splitlines()[-1])['elapsed']
+    except (IndexError, KeyError, ValueError):
+        elapsed = None
+
+    return {
+        'wall': wall,
+        'elapsed': elapsed,
+        'maxrss_kib': usage.ru_maxrss,
+        # includes the interpreter itself and other activity on the host
+        'spawns': spawns,
+        'returncode': process.returncode
+        }
+
+
+def run(sizes, scenarios, repeat=1, seed=0, unique=0.5, slow=0.01):
+    """Benchmark every scenario against a tree of each size."""
+
+    import os
+    import shutil
+    import tempfile
+
+    from generate import generate
+
+    log = logging.getLogger(__program__)
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    results = []
+
+    with tempfile.TemporaryDirectory(prefix='triggerd-bench.') as temporary:
+
+        # keep the cache, state and any default triggers out of $HOME
+        state = os.path.join(temporary, 'state')
+        environment = dict(os.environ, HOME=temporary, XDG_STATE_HOME=state)
+
+        for size in sizes:
+
+            source = os.path.join(temporary, 'source%s' % size)
+            generate(source, size, seed, unique, slow)
+            config = os.path.join(source, 'triggers.conf')
+
+            for scenario in scenarios:
+                for iteration in range(repeat):
+
+                    # start from an untouched tree (and no recorded runs,
+                    # locks or cache) every time
+                    tree = os.path.join(temporary, 'tree')
+                    shutil.rmtree(tree, ignore_errors=True)
+                    shutil.rmtree(state, ignore_errors=True)
+                    shutil.copytree(os.path.join(source, 'events'), tree)
+
+                    code = SCENARIOS[scenario].format(config=config,
+                                                      tree=tree)
+
+                    result = dict(scenario=scenario, events=size,
+                                  iteration=iteration)
+                    result.update(measure(code, root, environment))
+                    results.append(result)
+
+                    log.info("%s x %s (#%s): %.3fs wall, %s KiB peak RSS, "
+                             "%s spawns", scenario, size, iteration,
+                             result['wall'], result['maxrss_kib'],
+                             result['spawns'])
+
+            shutil.rmtree(source)
+
+    return results
+
+
+def _commit():
+    """Return the commit being benchmarked (if known)."""
+
+    import os
+    import subprocess
+
+    try:
+        return subprocess.check_output(
+            ['git', 'describe', '--always', '--dirty'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _processes():
+    """Return the number of processes created since boot."""
+
+    with open('/proc/stat') as file:
+        for line in file:
+            if line.startswith('processes '):
+                return int(line.split()[1])
+
+    return 0
+
+
+def main(args=None):
+    """Start and configure application."""
+
+    import argparse
+    import json
+    import platform
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '-o', '--output',
+        help='write JSON results to FILE (default: standard output)',
+        metavar='FILE')
+    parser.add_argument(
+        '-r', '--repeat',
+        default=3,
+        help='runs of each scenario (default: %(default)s)',
+        type=int)
+    parser.add_argument(
+        '-s', '--scenario',
+        action='append',
+        choices=sorted(SCENARIOS),
+        dest='scenarios',
+        help='scenario to run (may be repeated, default: all)')
+    parser.add_argument(
+        '--seed',
+        default=0,
+        help='random seed for the event trees (default: %(default)s)',
+        type=int)
+    parser.add_argument(
+        '--sizes',
+        default='100,1000,10000',
+        help='comma separated event tree sizes (default: %(default)s)')
+    parser.add_argument(
+        '--slow',
+        default=0.01,
+        help='fraction of status tests that sleep (default: %(default)s)',
+        type=float)
+    parser.add_argument(
+        '--unique',
+        default=0.5,
+        help='fraction of distinct COMMANDs (default: %(default)s)',
+        type=float)
+    options = parser.parse_args(args)
+
+    logging.basicConfig(format='(%(name)s) %(levelname)s: %(message)s',
+                        level=logging.INFO)
+
+    results = run([int(s) for s in options.sizes.split(',')],
+                  options.scenarios or sorted(SCENARIOS), options.repeat,
+                  options.seed, options.unique, options.slow)
+
+    document = json.dumps({
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.time(),
+        'options': vars(options),
+        'results': results
+        }, indent=2, sort_keys=True) + '\n'
+
+    if options.output is None:
+        sys.stdout.write(document)
+    else:
+        with open(options.output, 'w') as file:
+            file.write(document)
+
+
+if __name__ == '__main__':
+    main()
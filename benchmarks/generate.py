@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Generate a synthetic tree of event files for benchmarking triggerd"""
+
+import logging
+
+__program__ = 'generate'
+
+# stub COMMANDs by TEST_TYPE (`{n}` is replaced by a random number)
+COMMANDS = {
+    'arithmetic': ['echo {n}', 'expr {n} + 1'],
+    'content': ['echo hello world', 'seq 1 {n}',
+                "head -c 1048576 /dev/zero | tr '\\0' x"],
+    'status': ['true', 'false', 'sleep 0.1']
+    }
+
+# MATCH_CRITERIA by TEST_TYPE
+CRITERIA = {
+    'arithmetic': ['eq', 'ge', 'gt', 'le', 'lt', 'ne'],
+    'content': ['contains', 'does_not_contain', 'matches', 'null',
+                'not_null', 'regex', 'not_regex'],
+    'status': ['eq', 'ne']
+    }
+
+
+def event(number, rng, unique=0.5, slow=0.01):
+    """
+    Return the contents of a random event file.
+
+    A fraction `unique` of COMMANDs are made distinct (so that they are
+    not shared with other events) and a fraction `slow` of status tests
+    sleep.
+    """
+
+    test_type = rng.choice(sorted(COMMANDS))
+
+    commands = COMMANDS[test_type]
+    if test_type == 'status' and rng.random() >= slow:
+        commands = [c for c in commands if not c.startswith('sleep')]
+
+    command = rng.choice(commands).format(n=rng.randint(1, 100000))
+    if rng.random() < unique:
+        command = ': %s; %s' % (number, command)
+
+    criteria = rng.choice(CRITERIA[test_type])
+
+    if test_type == 'content':
+        match = rng.choice(['hello', '99', 'xxx', '^1$', 'absent'])
+    else:
+        match = str(rng.choice([0, 1, rng.randint(1, 100000)]))
+
+    lines = [
+        'COMMAND=%s' % command,
+        'EVENT_NAME=Benchmark %s' % number,
+        'MATCH_CONTENT=%s' % match,
+        'MATCH_CRITERIA=%s' % criteria,
+        'STATUS=enabled',
+        'TEST_TYPE=%s' % test_type
+        ]
+
+    # mix local stub triggers (and the occasional default trigger)
+    trigger = rng.random()
+    if trigger < 0.45:
+        lines.append('TRIGGER_CUSTOM=true')
+    elif trigger < 0.9:
+        lines.append('TRIGGER_NAMED=stub')
+
+    return '\n'.join(lines) + '\n'
+
+
+def generate(folder, count, seed=0, unique=0.5, slow=0.01, width=100):
+    """
+    Write `count` event files to `folder` (in subfolders of `width`
+    files) along with a triggers.conf defining the stub trigger.
+    """
+
+    import os
+    import random
+
+    rng = random.Random(seed)
+
+    os.makedirs(folder, exist_ok=True)
+
+    with open(os.path.join(folder, 'triggers.conf'), 'w') as file:
+        file.write('stub=true\n')
+
+    for number in range(count):
+        subfolder = os.path.join(folder, 'events', str(number // width))
+        if number % width == 0:
+            os.makedirs(subfolder, exist_ok=True)
+        path = os.path.join(subfolder, 'event%s.txt' % number)
+        with open(path, 'w') as file:
+            file.write(event(number, rng, unique, slow))
+
+    logging.getLogger(__program__).info(
+        "Generated %s event files in '%s'", count, folder)
+
+
+def main(args=None):
+    """Start and configure application."""
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        'folder',
+        help='destination folder (events are written to FOLDER/events)')
+    parser.add_argument(
+        '-n', '--count',
+        default=1000,
+        help='number of event files (default: %(default)s)',
+        type=int)
+    parser.add_argument(
+        '--seed',
+        default=0,
+        help='random seed (default: %(default)s)',
+        type=int)
+    parser.add_argument(
+        '--slow',
+        default=0.01,
+        help='fraction of status tests that sleep (default: %(default)s)',
+        type=float)
+    parser.add_argument(
+        '--unique',
+        default=0.5,
+        help='fraction of distinct COMMANDs (default: %(default)s)',
+        type=float)
+    options = parser.parse_args(args)
+
+    logging.basicConfig(format='(%(name)s) %(levelname)s: %(message)s',
+                        level=logging.INFO)
+
+    generate(options.folder, options.count, options.seed, options.unique,
+             options.slow)
+
+
+if __name__ == '__main__':
+    main()
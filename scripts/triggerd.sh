@@ -18,11 +18,27 @@ load_event(){
     declare -gA event
     event[triggered]=0
     event[FILENAME]=${event_file##*/}
-    while IFS= read -r line; do
+    local line lines
+    mapfile -t lines < "$event_file"
+    for line in "${lines[@]}"; do
         local parameter=${line%%=*}
         local value=${line#*=}
         [[ -n $parameter && -n $value ]] && event["$parameter"]="$value"
-    done < "$event_file"
+    done
+}
+
+load_triggers(){
+    # read the trigger templates once per run rather than once per trigger
+    unset triggers
+    declare -gA triggers
+    [[ -f $CONFIG && -r $CONFIG ]] || return
+    local line lines
+    mapfile -t lines < "$CONFIG"
+    for line in "${lines[@]}"; do
+        if [[ $line =~ ^([^[:space:]=]+)\ *=\ *(.*)$ && -z ${triggers[${BASH_REMATCH[1]}]+set} ]]; then
+            triggers[${BASH_REMATCH[1]}]=${BASH_REMATCH[2]}
+        fi
+    done
 }
 
 logger(){
@@ -70,11 +86,7 @@ prepare_trigger(){
         elif [[ ! -r $CONFIG ]]; then
             logger ERROR "No read access to '$CONFIG'"
         else
-            if hash bash-config 2>/dev/null; then
-                event[trigger]=$(bash-config "$CONFIG" "${event[TRIGGER_NAMED]}" 2>/dev/null)
-            else
-                event[trigger]=$(sed -n "s/^${event[TRIGGER_NAMED]}\ *=\ *//p" "$CONFIG" 2>/dev/null)
-            fi
+            event[trigger]=${triggers[${event[TRIGGER_NAMED]}]}
 
             if [[ -z ${event[trigger]} ]]; then
                 eventlog WARNING "${event[FILENAME]}" "TRIGGER_NAMED '${event[TRIGGER_NAMED]}' is not defined in '$CONFIG'"
@@ -89,98 +101,7 @@ prepare_trigger(){
     fi
 }
 
-verify_event(){
-    local errors=0
-    local missing=()
-
-    [[ -z ${event[MATCH_CONTENT]} && ! ${event[MATCH_CRITERIA]} =~ ^(null|not_null)$ ]] && missing+=(MATCH_CONTENT)
-
-    for element in COMMAND EVENT_NAME MATCH_CRITERIA STATUS TEST_TYPE; do
-        [[ -z ${event[$element]} ]] && missing+=($element)
-    done
-
-    if [[ ${#missing[@]} -gt 0 ]]; then
-        eventlog ERROR "${event[FILENAME]}" "Missing ${missing[@]}"
-        ((++errors))
-    fi
-
-    if [[ -n ${event[TEST_TYPE]} && ! ${event[TEST_TYPE]} =~ ^(arithmetic|content|status)$ ]]; then
-        eventlog ERROR "${event[FILENAME]}" "Invalid TEST_TYPE"
-        ((++errors))
-    fi
-
-    if [[ ${event[TEST_TYPE]} =~ ^(arithmetic|status)$ ]]; then
-        if [[ -n ${event[MATCH_CONTENT]} && ! ${event[MATCH_CONTENT]} =~ ^-?[0-9]+$ ]]; then
-            eventlog ERROR "${event[FILENAME]}" "MATCH_CONTENT must be an integer for arithmetic operations"
-            ((++errors))
-        fi
-        if [[ -n ${event[MATCH_CRITERIA]} && ! ${event[MATCH_CRITERIA]} =~ ^(eq|ge|gt|le|lt|ne)$ ]]; then
-            eventlog ERROR "${event[FILENAME]}" "Invalid MATCH_CRITERIA for arithmetic operations"
-            ((++errors))
-        fi
-    fi
-
-    if [[ ${event[TEST_TYPE]} = content && -n ${event[MATCH_CRITERIA]} && ! ${event[MATCH_CRITERIA]} =~ ^(contains|does_not_contain|matches|does_not_match|null|not_null)$ ]]; then
-        eventlog ERROR "${event[FILENAME]}" "Invalid MATCH_CRITERIA for content operations"
-        ((++errors))
-    fi
-
-    if [[ -n ${event[TRIGGER_CUSTOM]} && -n ${event[TRIGGER_NAMED]} ]]; then
-        eventlog ERROR "${event[FILENAME]}" "TRIGGER_CUSTOM and TRIGGER_NAMED are both indicated (choose one or neither)"
-        ((++errors))
-    fi
-
-    if (( errors == 1 )); then
-        eventlog WARNING "${event[FILENAME]}" "Encountered 1 issue verifying event file"
-        return 1
-    elif (( errors >= 2 )); then
-        eventlog WARNING "${event[FILENAME]}" "Encountered $errors issues verifying event file"
-        return 1
-    fi
-}
-
-
-if (( $# == 0 )); then
-    logger ERROR "Please indicate target event files and/or directories"
-    logger ERROR "Try '$PROGRAM --help' for more information."
-    exit 1
-elif (( $# == 1 )) && [[ $1 =~ ^(-h|--help)$ ]]; then
-    echo "Usage: $PROGRAM <event files|folders>"
-    echo "Trigger an event or notification upon the output of a command."
-    echo
-    echo "  --verbose              show event execution details"
-    echo "  --verify               verify event files without execution"
-    exit 0
-fi
-
-events=()
-for arg in "$@"; do
-    if [[ $arg = --verbose ]]; then
-        option_verbose=1
-    elif [[ $arg = --verify ]]; then
-        option_verify=1
-    elif [[ -f $arg ]]; then
-        events+=("$arg")
-    elif [[ -d $arg ]]; then
-        if [[ -r $arg ]]; then
-            while IFS= read -rd $'\0' line; do
-                events+=("$line")
-            done < <(find "$arg" -type f -writable \( -name '*.conf' -o -name '*.txt' \) ! -empty ! -name '.*' -print0)
-        else
-            logger ERROR "Skipping '$arg' directory (no read access)"
-        fi
-    fi
-done
-
-if (( ${#events[@]} == 0 )); then
-    logger ERROR "You have not supplied any valid targets"
-    exit 1
-fi
-
-logger INFO "processing ${#events[@]} events"
-
-for event_file in "${events[@]}"; do
-
+process_event(){
     load_event
 
     if (( option_verify == 1 )); then
@@ -193,13 +114,13 @@ for event_file in "${events[@]}"; do
         fi
         option_verbose=0
         prepare_trigger
-        continue
+        return
     elif [[ ${event[STATUS]} != enabled ]]; then
         eventlog INFO "${event[FILENAME]}" "Not enabled (skipping)"
-        continue
+        return
     elif ! verify_event; then
         eventlog INFO "${event[FILENAME]}" "Failed verification (skipping)"
-        continue
+        return
     fi
 
     # execute event command
@@ -251,7 +172,7 @@ for event_file in "${events[@]}"; do
         eventlog INFO "${event[FILENAME]}" "Trigger conditions are met"
     else
         eventlog INFO "${event[FILENAME]}" "Trigger conditions not met"
-        continue
+        return
     fi
 
     prepare_trigger
@@ -274,4 +195,132 @@ for event_file in "${events[@]}"; do
     else
         eventlog ERROR "${event[FILENAME]}" "Event file STATUS unsuccessfully updated to triggered!"
     fi
+}
+
+verify_event(){
+    local errors=0
+    local missing=()
+
+    [[ -z ${event[MATCH_CONTENT]} && ! ${event[MATCH_CRITERIA]} =~ ^(null|not_null)$ ]] && missing+=(MATCH_CONTENT)
+
+    for element in COMMAND EVENT_NAME MATCH_CRITERIA STATUS TEST_TYPE; do
+        [[ -z ${event[$element]} ]] && missing+=($element)
+    done
+
+    if [[ ${#missing[@]} -gt 0 ]]; then
+        eventlog ERROR "${event[FILENAME]}" "Missing ${missing[@]}"
+        ((++errors))
+    fi
+
+    if [[ -n ${event[TEST_TYPE]} && ! ${event[TEST_TYPE]} =~ ^(arithmetic|content|status)$ ]]; then
+        eventlog ERROR "${event[FILENAME]}" "Invalid TEST_TYPE"
+        ((++errors))
+    fi
+
+    if [[ ${event[TEST_TYPE]} =~ ^(arithmetic|status)$ ]]; then
+        if [[ -n ${event[MATCH_CONTENT]} && ! ${event[MATCH_CONTENT]} =~ ^-?[0-9]+$ ]]; then
+            eventlog ERROR "${event[FILENAME]}" "MATCH_CONTENT must be an integer for arithmetic operations"
+            ((++errors))
+        fi
+        if [[ -n ${event[MATCH_CRITERIA]} && ! ${event[MATCH_CRITERIA]} =~ ^(eq|ge|gt|le|lt|ne)$ ]]; then
+            eventlog ERROR "${event[FILENAME]}" "Invalid MATCH_CRITERIA for arithmetic operations"
+            ((++errors))
+        fi
+    fi
+
+    if [[ ${event[TEST_TYPE]} = content && -n ${event[MATCH_CRITERIA]} && ! ${event[MATCH_CRITERIA]} =~ ^(contains|does_not_contain|matches|does_not_match|null|not_null)$ ]]; then
+        eventlog ERROR "${event[FILENAME]}" "Invalid MATCH_CRITERIA for content operations"
+        ((++errors))
+    fi
+
+    if [[ -n ${event[TRIGGER_CUSTOM]} && -n ${event[TRIGGER_NAMED]} ]]; then
+        eventlog ERROR "${event[FILENAME]}" "TRIGGER_CUSTOM and TRIGGER_NAMED are both indicated (choose one or neither)"
+        ((++errors))
+    fi
+
+    if (( errors == 1 )); then
+        eventlog WARNING "${event[FILENAME]}" "Encountered 1 issue verifying event file"
+        return 1
+    elif (( errors >= 2 )); then
+        eventlog WARNING "${event[FILENAME]}" "Encountered $errors issues verifying event file"
+        return 1
+    fi
+}
+
+
+if (( $# == 0 )); then
+    logger ERROR "Please indicate target event files and/or directories"
+    logger ERROR "Try '$PROGRAM --help' for more information."
+    exit 1
+elif (( $# == 1 )) && [[ $1 =~ ^(-h|--help)$ ]]; then
+    echo "Usage: $PROGRAM [-j N] <event files|folders>"
+    echo "Trigger an event or notification upon the output of a command."
+    echo
+    echo "  -j, --jobs N           execute up to N events at once (default: 1)"
+    echo "  --verbose              show event execution details"
+    echo "  --verify               verify event files without execution"
+    exit 0
+fi
+
+events=()
+option_jobs=1
+while (( $# > 0 )); do
+    arg=$1
+    shift
+    if [[ $arg =~ ^(-j|--jobs)$ ]]; then
+        option_jobs=$1
+        shift
+    elif [[ $arg =~ ^(-j|--jobs=)(.+)$ ]]; then
+        option_jobs=${BASH_REMATCH[2]}
+    elif [[ $arg = --verbose ]]; then
+        option_verbose=1
+    elif [[ $arg = --verify ]]; then
+        option_verify=1
+    elif [[ -f $arg ]]; then
+        events+=("$arg")
+    elif [[ -d $arg ]]; then
+        if [[ -r $arg ]]; then
+            while IFS= read -rd $'\0' line; do
+                events+=("$line")
+            done < <(find "$arg" -type f -writable \( -name '*.conf' -o -name '*.txt' \) ! -empty ! -name '.*' -print0)
+        else
+            logger ERROR "Skipping '$arg' directory (no read access)"
+        fi
+    fi
 done
+
+if [[ ! $option_jobs =~ ^[1-9][0-9]*$ ]]; then
+    logger ERROR "Invalid number of jobs '$option_jobs'"
+    exit 1
+elif (( option_jobs > 1 )) && (( BASH_VERSINFO[0] < 4 || ( BASH_VERSINFO[0] == 4 && BASH_VERSINFO[1] < 3 ) )); then
+    # wait -n is required to keep job slots filled
+    logger WARNING "Parallel execution requires bash 4.3 or later (executing events one at a time)"
+    option_jobs=1
+fi
+
+if (( ${#events[@]} == 0 )); then
+    logger ERROR "You have not supplied any valid targets"
+    exit 1
+fi
+
+logger INFO "processing ${#events[@]} events ($option_jobs at a time)"
+
+load_triggers
+
+running=0
+for event_file in "${events[@]}"; do
+    if (( option_jobs == 1 || option_verify == 1 )); then
+        process_event
+    else
+        # execute events as background jobs, keeping at most
+        # $option_jobs running at once
+        if (( running >= option_jobs )); then
+            wait -n
+            ((--running))
+        fi
+        process_event &
+        ((++running))
+    fi
+done
+
+wait
@@ -21,7 +21,8 @@ setup(
     keywords=['automation', 'cron', 'monitoring', 'trigger', 'triggering'],
     py_modules=['triggerd'],
     scripts=['scripts/bash-config', 'scripts/triggerd.sh'],
-    install_requires=['configobj'],
+    extras_require={'configobj': ['configobj']},
+    python_requires='>=3.7',
     data_files=[
         ('share/triggerd/examples',
          ['examples/event.txt', 'examples/triggers.conf'])
@@ -41,11 +42,11 @@ setup(
         'Operating System :: POSIX',
         'Operating System :: POSIX :: Linux',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.0',
-        'Programming Language :: Python :: 3.1',
-        'Programming Language :: Python :: 3.2',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
         'Programming Language :: Python :: 3 :: Only',
         'Programming Language :: Unix Shell',
         'Topic :: Home Automation',
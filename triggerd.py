@@ -15,9 +15,8 @@ class EventFile:
 
     """Manipulate event file."""
 
-    def __init__(self, path, config=None):
+    def __init__(self, path, config=None, data=None):
 
-        import configobj
         import os
 
         # event file path
@@ -26,22 +25,34 @@ class EventFile:
         # event file basename
         self.basename = os.path.basename(self.path)
 
-        # open event as a config file
-        self.data = configobj.ConfigObj(
-            self.path, interpolation=False, list_values=False)
+        # log record attributes (see _eventlogger)
+        self.context = {'basename': self.basename}
+
+        # (inode, modification time, size) of the event file when it was
+        # parsed (None if unknown)
+        self.identity = None
+
+        # open event as a config file (unless it was already parsed)
+        self.data = data
+        if self.data is None:
+            self.reload()
 
         # trigger config file path
         self.config = config
 
+        # verification result (None until verified)
+        self.verified = None
+
+        # compiled MATCH_CONTENT pattern (None until compiled)
+        self.pattern = None
+
     class TriggerFile:
 
         """Manipulate event trigger configuration."""
 
-        def __init__(self, event):
+        def __init__(self, event, registry=None):
             """Configure trigger."""
 
-            import configobj
-
             log = logging.getLogger('event')
 
             self.event = event
@@ -71,140 +82,230 @@ class EventFile:
             self.default_string = trigger
             self.trigger_string = None
 
+            # default trigger (with the event's variables declared)
+            self.fallback_string = default.format(
+                event_name, match_content, self.default_string)
+
             if trigger_custom:
                 self.trigger_string = default.format(
                     event_name, match_content, trigger_custom)
                 log.info(
                     "Configured to use TRIGGER_CUSTOM (%s)",
-                    trigger_custom, extra=self.event.__dict__)
+                    trigger_custom, extra=self.event.context)
 
             elif trigger_named:
-                trigger_file = configobj.ConfigObj(self.event.config,
-                                                   interpolation=False,
-                                                   list_values=False)
-                trigger_definition = trigger_file.get(trigger_named)
+                if registry is None:
+                    registry = TriggerRegistry(self.event.config)
+                trigger_definition = registry.get(trigger_named)
                 if trigger_definition:
                     self.trigger_string = default.format(
                         event_name, match_content, trigger_definition)
                     log.info(
                         "Configured to use TRIGGER_NAMED '%s' (%s)",
                         trigger_named, trigger_definition,
-                        extra=self.event.__dict__)
+                        extra=self.event.context)
                 else:
                     log.info(
                         "TRIGGER_NAMED '%s' is not defined in '%s'",
                         trigger_named, self.event.config,
-                        extra=self.event.__dict__)
+                        extra=self.event.context)
 
             # resort to default trigger
             if self.trigger_string is None:
-                self.trigger_string = default.format(
-                        event_name, match_content, self.default_string)
+                self.trigger_string = self.fallback_string
                 log.warning(
                     "No trigger configured (will use default)",
-                    extra=self.event.__dict__)
+                    extra=self.event.context)
 
-        def execute(self):
-            """Manage execution of event's trigger."""
+        def execute(self, update=True):
+            """
+            Manage execution of event's trigger and return success status.
+            Unless `update` is False (to permit updating many event files
+            at once), the event STATUS is updated upon success.
+            """
 
             log = logging.getLogger('event')
             log.info(
                 "Executing trigger (%s)", self.trigger_string,
-                extra=self.event.__dict__)
+                extra=self.event.context)
+
+            success = self.helper()
 
             # update event STATUS upon success
-            if self.helper():
+            if success and update:
                 self.writer()
 
+            return success
+
         def helper(self):
             """Execute event's trigger and return success status."""
 
-            log = logging.getLogger('event')
-
-            if _getstatus(self.trigger_string) == 0:
-
-                if self.is_default:
-                    log.info("Successfully executed default trigger",
-                             extra=self.event.__dict__)
-                else:
-                    log.info("Successfully executed configured trigger",
-                             extra=self.event.__dict__)
+            if self.report(
+                    _getstatus(self.trigger_string, self.timeout()) == 0):
                 return True
 
-            elif not self.is_default:
+            # retry with the default trigger
+            if not self.is_default:
+                return self.report(
+                    _getstatus(self.fallback_string, self.timeout()) == 0,
+                    retry=True)
 
-                log.error("Failed to execute custom or named trigger",
-                          extra=self.event.__dict__)
+            return False
 
-                if _getstatus(self.default_string) == 0:
-                    log.info("Retry successfully executed default trigger",
-                             extra=self.event.__dict__)
-                    return True
+        @property
+        def is_default(self):
+            """Check whether currently trigger is the default."""
+            return self.trigger_string == self.fallback_string
 
-                else:
-                    log.error("Retry failed to execute default trigger",
-                              extra=self.event.__dict__)
+        def report(self, success, retry=False):
+            """Log the outcome of an attempt and return `success`."""
 
-            else:
+            log = logging.getLogger('event')
 
+            if retry and success:
+                log.info("Retry successfully executed default trigger",
+                         extra=self.event.context)
+            elif retry:
+                log.error("Retry failed to execute default trigger",
+                          extra=self.event.context)
+            elif success and self.is_default:
+                log.info("Successfully executed default trigger",
+                         extra=self.event.context)
+            elif success:
+                log.info("Successfully executed configured trigger",
+                         extra=self.event.context)
+            elif self.is_default:
                 log.error("Failed to execute default trigger",
-                          extra=self.event.__dict__)
+                          extra=self.event.context)
+            else:
+                log.error("Failed to execute custom or named trigger",
+                          extra=self.event.context)
 
-            return False
+            return success
 
-        @property
-        def is_default(self):
-            """Check whether currently trigger is the default."""
-            return self.trigger_string == self.default_string
+        def timeout(self, default=20):
+            """Return the event's TRIGGER_TIMEOUT in seconds (or `default`)."""
+            try:
+                return _interval(self.event.data.get('TRIGGER_TIMEOUT'))
+            except (TypeError, ValueError):
+                return default
 
         def writer(self):
             """Update event's config file upon trigger."""
 
-            import configobj
-            import subprocess
-
             log = logging.getLogger('event')
 
             log.debug("Updating event file STATUS to triggered",
-                      extra=self.event.__dict__)
+                      extra=self.event.context)
 
             # ensure STATUS is not already set to triggered
             if self.event.data.get('STATUS') == 'triggered':
                 log.error("Event file STATUS not updated (it was already "
-                          "changed)", extra=self.event.__dict__)
+                          "changed)", extra=self.event.context)
                 return
 
-            sedscript = 's/STATUS=enabled/STATUS=triggered/;' \
-                        's/STATUS = enabled/STATUS = triggered/'
-
             try:
                 # update STATUS to triggered
-                subprocess.check_call(
-                    ['sed', '-i', sedscript, self.event.data.filename],
-                    stderr=subprocess.PIPE,
-                    stdout=subprocess.PIPE)
-            except subprocess.CalledProcessError:
-                log.error("Exception while updating STATUS to triggered",
-                          extra=self.event.__dict__)
-                return
-
-            try:
-                # reload event
-                self.event.data.reload()
-            except configobj.ReloadError:
-                log.error("Failed to reload event file after update",
-                          extra=self.event.__dict__)
+                updated = _setstatus(self.event.path, 'enabled', 'triggered')
+            except OSError as exc:
+                log.error("Exception while updating STATUS to triggered "
+                          "(%s)", exc, extra=self.event.context)
                 return
 
             # ensure STATUS was set to triggered
-            if self.event.data.get('STATUS') == 'triggered':
+            if updated:
+                self.event.data['STATUS'] = 'triggered'
                 log.info("STATUS successfully updated to triggered",
-                         extra=self.event.__dict__)
-                return
+                         extra=self.event.context)
             else:
                 log.error("STATUS unsuccessfully updated to triggered!",
-                          extra=self.event.__dict__)
-                return
+                          extra=self.event.context)
+
+    class ContentMatcher:
+
+        """Evaluate content criteria incrementally as output streams in."""
+
+        # criteria evaluated by a matcher (the result of all but regex
+        # criteria may be known before output is exhausted)
+        criteria = ('contains', 'does_not_contain', 'null', 'not_null',
+                    'regex', 'not_regex')
+
+        def __init__(self, criteria, match, pattern=None):
+
+            import re
+
+            self.criteria = criteria
+
+            # encoded MATCH_CONTENT (output is matched as bytes)
+            self.match = (match or '').encode()
+
+            # compiled pattern (so that patterns can be searched for
+            # together, see _search)
+            self.pattern = pattern
+            if criteria in ('contains', 'does_not_contain'):
+                self.pattern = re.compile(re.escape(self.match))
+
+            # whether the searched for content was found
+            # (None until known for regex criteria)
+            self.found = None if self.regex else \
+                criteria in ('contains', 'does_not_contain') and \
+                not self.match
+
+            # whether literal content is searched for by the caller
+            # (rather than by feed)
+            self.shared = False
+
+            # number of output bytes consumed
+            self.size = 0
+
+            # end of previous chunk (to find matches spanning chunks)
+            self.tail = b''
+
+            # output retained for regex criteria
+            self.chunks = []
+
+        def feed(self, chunk):
+            """Consume a chunk of output and return whether it decided."""
+
+            self.size += len(chunk)
+
+            if self.regex:
+                self.chunks.append(chunk)
+                return False
+
+            if self.found:
+                return True
+
+            if self.shared:
+                return False
+
+            if self.criteria in ('contains', 'does_not_contain'):
+                window = self.tail + chunk
+                self.found = self.match in window
+                keep = len(self.match) - 1
+                self.tail = window[-keep:] if keep else b''
+            else:
+                self.found = bool(chunk.strip())
+
+            return self.found
+
+        @property
+        def regex(self):
+            """Check whether the criteria is a regular expression."""
+            return self.criteria in ('regex', 'not_regex')
+
+        @property
+        def result(self):
+            """Return the result of the content evaluation."""
+
+            if self.found is None:
+                output = b''.join(self.chunks).decode(errors='replace')
+                self.found = self.pattern.search(output.strip()) is not None
+                self.chunks = []
+
+            if self.criteria in ('contains', 'not_null', 'regex'):
+                return self.found
+            return not self.found
 
     def _contains(self, match, content):
         """content contains match (match in content)."""
@@ -212,7 +313,7 @@ class EventFile:
 
         log = logging.getLogger('event')
         log.info("CONTENT TEST | '%s' in '%s' => %s", match,
-                 content, result, extra=self.__dict__)
+                 _Output(content), result, extra=self.context)
 
         return result
 
@@ -222,7 +323,7 @@ class EventFile:
 
         log = logging.getLogger('event')
         log.info("CONTENT TEST | '%s' matches '%s' => %s", match,
-                 content, result, extra=self.__dict__)
+                 _Output(content), result, extra=self.context)
 
         return result
 
@@ -232,7 +333,7 @@ class EventFile:
 
         log = logging.getLogger('event')
         log.info("CONTENT TEST | '%s' not in '%s' => %s", match,
-                 content, result, extra=self.__dict__)
+                 _Output(content), result, extra=self.context)
 
         return result
 
@@ -242,7 +343,7 @@ class EventFile:
 
         log = logging.getLogger('event')
         log.info("CONTENT TEST | '%s' does not match '%s' => %s",
-                 match, content, result, extra=self.__dict__)
+                 match, _Output(content), result, extra=self.context)
 
         return result
 
@@ -252,7 +353,7 @@ class EventFile:
 
         log = logging.getLogger('event')
         log.info("CONTENT TEST | '%s' is not null => '%s'",
-                 content, result, extra=self.__dict__)
+                 _Output(content), result, extra=self.context)
 
         return result
 
@@ -261,11 +362,43 @@ class EventFile:
         result = content == ''
 
         log = logging.getLogger('event')
-        log.info("CONTENT TEST | '%s' is null => '%s'", content,
-                 result, extra=self.__dict__)
+        log.info("CONTENT TEST | '%s' is null => '%s'", _Output(content),
+                 result, extra=self.context)
+
+        return result
+
+    def _notregex(self, match, content):
+        """match is not found in content (not re.search(match, content))."""
+        result = self.regex().search(content) is None
+
+        log = logging.getLogger('event')
+        log.info("CONTENT TEST | '%s' not found in '%s' => %s", match,
+                 _Output(content), result, extra=self.context)
+
+        return result
+
+    def _regex(self, match, content):
+        """match is found in content (re.search(match, content))."""
+        result = self.regex().search(content) is not None
+
+        log = logging.getLogger('event')
+        log.info("CONTENT TEST | '%s' found in '%s' => %s", match,
+                 _Output(content), result, extra=self.context)
 
         return result
 
+    # content operations keyed by MATCH_CRITERIA
+    operations = {
+        'contains': _contains,
+        'does_not_contain': _notcontains,
+        'matches': _matches,
+        'does_not_match': _notmatch,
+        'null': _null,
+        'not_null': _notnull,
+        'regex': _regex,
+        'not_regex': _notregex
+        }
+
     def arithmetic(self, content):
         """Perform an arithmetic evaluation."""
         import operator
@@ -284,7 +417,7 @@ class EventFile:
         except ValueError:
             log.info(
                 "'%s' is not an integer (required for arithmetic "
-                "operations)", content, extra=self.__dict__)
+                "operations)", _Output(content), extra=self.context)
             return False
 
         try:
@@ -292,7 +425,7 @@ class EventFile:
         except ValueError:
             log.error(
                 "MATCH_CONTENT must be an integer for arithmetic "
-                "operations", extra=self.__dict__)
+                "operations", extra=self.context)
             return False
 
         result = operations[criteria](content, match)
@@ -301,26 +434,32 @@ class EventFile:
 
         log.info(
             "%s TEST | '%s' %s '%s' => %s", test_type, content,
-            criteria, match, result, extra=self.__dict__)
+            criteria, match, result, extra=self.context)
 
         return result
 
-    def content(self, content):
+    def content(self, content, matcher=None):
         """Perform a content evaluation."""
 
-        operations = {
-            'contains': self._contains,
-            'does_not_contain': self._notcontains,
-            'matches': self._matches,
-            'does_not_match': self._notmatch,
-            'null': self._null,
-            'not_null': self._notnull
-            }
+        if matcher is not None and matcher.regex:
+            log = logging.getLogger('event')
+            log.info("CONTENT TEST | '%s' %s output => %s",
+                     self.data.get('MATCH_CONTENT'), matcher.criteria,
+                     matcher.result, extra=self.context)
+            return matcher.result
+
+        if matcher is not None:
+            log = logging.getLogger('event')
+            log.info("CONTENT TEST | '%s' %s streamed output (%s bytes) "
+                     "=> %s", self.data.get('MATCH_CONTENT'),
+                     matcher.criteria, matcher.size, matcher.result,
+                     extra=self.context)
+            return matcher.result
 
         criteria = self.data.get('MATCH_CRITERIA')
         match = self.data.get('MATCH_CONTENT')
 
-        result = operations[criteria](match, content)
+        result = self.operations[criteria](self, match, content)
 
         return result
 
@@ -329,18 +468,109 @@ class EventFile:
         """Check whether an event file is enabled."""
         return self.data.get('STATUS') == 'enabled'
 
-    def test(self):
-        """Execute and evaluate output of COMMAND per TEST_TYPE."""
+    def interval(self, default=60):
+        """Return the event's INTERVAL in seconds (or `default`)."""
+        try:
+            return _interval(self.data.get('INTERVAL'))
+        except (TypeError, ValueError):
+            return default
 
-        status, output = _getstatusoutput(self.data.get('COMMAND'))
+    def evaluate(self, status, output, matcher=None):
+        """Evaluate exit status and output of COMMAND per TEST_TYPE."""
 
         test_type = self.data.get('TEST_TYPE')
 
         if (test_type == 'arithmetic' and self.arithmetic(output)) or \
-           (test_type == 'content' and self.content(output)) or \
+           (test_type == 'content' and self.content(output, matcher)) or \
            (test_type == 'status' and self.arithmetic(status)):
             return True
 
+        return False
+
+    def timeout(self, default=20):
+        """Return the event's TIMEOUT in seconds (or `default`)."""
+        try:
+            return _interval(self.data.get('TIMEOUT'))
+        except (TypeError, ValueError):
+            return default
+
+    def limit(self, default=16777216):
+        """Return the event's MAX_OUTPUT in bytes (or `default`)."""
+        try:
+            return int(self.data.get('MAX_OUTPUT'))
+        except (TypeError, ValueError):
+            return default
+
+    def matcher(self):
+        """Return a streaming content matcher (if the test permits one)."""
+
+        criteria = self.data.get('MATCH_CRITERIA')
+
+        if self.data.get('TEST_TYPE') != 'content' or \
+           criteria not in self.ContentMatcher.criteria:
+            return None
+
+        return self.ContentMatcher(
+            criteria, self.data.get('MATCH_CONTENT'),
+            self.regex() if criteria in ('regex', 'not_regex') else None)
+
+    def regex(self):
+        """Return MATCH_CONTENT as a compiled regular expression."""
+
+        import re
+
+        if self.pattern is None:
+            self.pattern = re.compile(self.data.get('MATCH_CONTENT'),
+                                      re.MULTILINE)
+
+        return self.pattern
+
+    def changed(self):
+        """Check whether the event file changed since it was parsed."""
+        return self.identity is None or \
+            _identity(self.path) != self.identity
+
+    def reload(self):
+        """Parse the event file from disk."""
+
+        self.identity = _identity(self.path)
+        self.data = _parse(self.path)
+
+        # discard any previous verification result and pattern
+        self.verified = None
+        self.pattern = None
+
+    def ready(self):
+        """Check whether an event file is enabled and passes verification."""
+
+        log = logging.getLogger('event')
+
+        # ensure event is enabled
+        if not self.enabled:
+
+            log.info("Not enabled (skipping)", extra=self.context)
+            return False
+
+        # ensure event verification is successful (unless already known)
+        elif not (self.verify() if self.verified is None else self.verified):
+
+            log.info("Failed verification (skipping)", extra=self.context)
+            return False
+
+        return True
+
+    def test(self, limit=16777216):
+        """Execute and evaluate output of COMMAND per TEST_TYPE."""
+
+        matcher = self.matcher()
+
+        status, output = _getstatusoutput(self.data.get('COMMAND'),
+                                          timeout=self.timeout(),
+                                          limit=self.limit(limit),
+                                          matcher=matcher)
+
+        return self.evaluate(status, output, matcher)
+
     def verify(self):
         """Verify  that an event file is formatted correctly."""
 
@@ -353,7 +583,8 @@ class EventFile:
         test_types = ['arithmetic', 'content', 'status']
         arithmetic_criteria = ['eq', 'ge', 'gt', 'le', 'lt', 'ne']
         content_criteria = ['contains', 'does_not_contain', 'matches',
-                            'does_not_match', 'null', 'not_null']
+                            'does_not_match', 'null', 'not_null',
+                            'regex', 'not_regex']
 
         # ensure we don't display errors for missing fields
         for dummy in [test_types, arithmetic_criteria, content_criteria]:
@@ -373,12 +604,12 @@ class EventFile:
 
         # identify missing mandatory fields
         if missing:
-            log.error("Missing %s", ' '.join(missing), extra=self.__dict__)
+            log.error("Missing %s", ' '.join(missing), extra=self.context)
             problems += 1
 
         # ensure TEST_TYPE is a valid test type
         if self.data.get('TEST_TYPE') not in test_types:
-            log.error("Invalid TEST_TYPE", extra=self.__dict__)
+            log.error("Invalid TEST_TYPE", extra=self.context)
             problems += 1
 
         # perform verification for arithmetic and status tests
@@ -391,14 +622,14 @@ class EventFile:
             except ValueError:
                 log.error(
                     "MATCH_CONTENT must be an integer for arithmetic "
-                    "operations", extra=self.__dict__)
+                    "operations", extra=self.context)
                 problems += 1
 
             # ensure MATCH_CRITERIA is an arithmetic operation
             if self.data.get('MATCH_CRITERIA') not in arithmetic_criteria:
                 log.error(
                     "Invalid MATCH_CRITERIA for arithmetic operations",
-                    extra=self.__dict__)
+                    extra=self.context)
                 problems += 1
 
         # perform verification for content tests
@@ -407,7 +638,38 @@ class EventFile:
             # ensure MATCH_CRITERIA is a content operation
             if self.data.get('MATCH_CRITERIA') not in content_criteria:
                 log.error("Invalid MATCH_CRITERIA for content operations",
-                          extra=self.__dict__)
+                          extra=self.context)
+                problems += 1
+
+            # ensure MATCH_CONTENT is a valid regular expression
+            elif self.data.get('MATCH_CRITERIA') in ('regex', 'not_regex') \
+                    and self.data.get('MATCH_CONTENT') is not None:
+                try:
+                    self.regex()
+                except re.error as exc:
+                    log.error(
+                        "MATCH_CONTENT must be a valid regular expression "
+                        "(%s)", exc, extra=self.context)
+                    problems += 1
+
+        # ensure MAX_OUTPUT is a positive integer
+        if self.data.get('MAX_OUTPUT') is not None and \
+           self.limit(0) <= 0:
+            log.error("MAX_OUTPUT must be a positive number of bytes",
+                      extra=self.context)
+            problems += 1
+
+        # ensure INTERVAL, TIMEOUT and TRIGGER_TIMEOUT are valid durations
+        for key in ('INTERVAL', 'TIMEOUT', 'TRIGGER_TIMEOUT'):
+            if self.data.get(key) is None:
+                continue
+            try:
+                _interval(self.data.get(key))
+            except ValueError:
+                log.error(
+                    "%s must be a positive number of seconds "
+                    "(optionally suffixed with s, m, h or d)", key,
+                    extra=self.context)
                 problems += 1
 
         # ensure custom and named triggers are not used concurrently
@@ -415,235 +677,3237 @@ class EventFile:
            self.data.get('TRIGGER_NAMED'):
             log.error(
                 "TRIGGER_CUSTOM and TRIGGER_NAMED are both indicated "
-                "(choose one or neither)", extra=self.__dict__)
+                "(choose one or neither)", extra=self.context)
             problems += 1
 
         if problems == 1:
             log.warning("Encountered 1 issue verifying event file",
-                        extra=self.__dict__)
+                        extra=self.context)
         elif problems >= 2:
             log.warning("Encountered %s issues verifying event file",
-                        problems, extra=self.__dict__)
+                        problems, extra=self.context)
 
-        return problems == 0
+        self.verified = problems == 0
 
+        return self.verified
 
-class EventRunner:
 
-    """Execute event file."""
+class EventRecord:
 
-    def __init__(self, path, config=None):
+    """Hold the keys of a parsed event file (or trigger config file)."""
 
-        log = logging.getLogger('event')
+    # keys an event file may define (any others are kept in `extra`)
+    __slots__ = ('COMMAND', 'EVENT_NAME', 'INTERVAL', 'MATCH_CONTENT',
+                 'MATCH_CRITERIA', 'MAX_OUTPUT', 'STATUS', 'TEST_TYPE',
+                 'TIMEOUT', 'TRIGGER_CUSTOM', 'TRIGGER_NAMED',
+                 'TRIGGER_TIMEOUT', 'extra')
 
-        eventfile = EventFile(path, config)
+    fields = frozenset(__slots__[:-1])
 
-        log.info("Processing event", extra=eventfile.__dict__)
+    def __init__(self, items=()):
 
-        # ensure event is enabled
-        if not eventfile.enabled:
+        for key in self.fields:
+            object.__setattr__(self, key, None)
 
-            log.info("Not enabled (skipping)", extra=eventfile.__dict__)
-            return
+        # other keys (e.g. trigger names) in the order they were read
+        self.extra = {}
 
-        # ensure event verification is successful
-        elif not eventfile.verify():
+        for key, value in dict(items).items():
+            self[key] = value
 
-            log.info("Failed verification (skipping)",
-                     extra=eventfile.__dict__)
-            return
+    def __contains__(self, key):
+        return self.get(key) is not None
 
-        if eventfile.test():
-            trigger = EventFile.TriggerFile(eventfile)
-            trigger.execute()
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
 
+    def __iter__(self):
+        return iter(self.keys())
 
-class EventVerifier:
+    def __len__(self):
+        return len(self.keys())
 
-    """Verify event file."""
+    def __setitem__(self, key, value):
+        if key in self.fields:
+            setattr(self, key, value)
+        else:
+            self.extra[key] = value
 
-    def __init__(self, path, config=None):
+    def get(self, key, default=None):
+        """Return the value of `key` (or `default` if it is undefined)."""
 
-        log = logging.getLogger('event')
+        if key in self.fields:
+            value = getattr(self, key)
+        else:
+            value = self.extra.get(key)
 
-        eventfile = EventFile(path, config)
+        return default if value is None else value
 
-        log.info("Verifying only", extra=eventfile.__dict__)
+    def items(self):
+        """Return (key, value) pairs of every defined key."""
+        return [(k, self.get(k)) for k in self.keys()]
 
-        # store the original log level
-        level = log.getEffectiveLevel()
+    def keys(self):
+        """Return every defined key."""
+        return [k for k in self.__slots__[:-1]
+                if getattr(self, k) is not None] + list(self.extra)
 
-        # ensure verification messages are displayed
-        log.setLevel(logging.INFO)
 
-        status = eventfile.verify()
+class EventResult:
 
-        # initialize trigger (to display configuration warnings)
-        EventFile.TriggerFile(eventfile)
+    """Outcome of evaluating an event file (see evaluate)."""
 
-        if status:
-            log.info("Verification OK", extra=eventfile.__dict__)
-        else:
-            log.info("Verification NOT OK", extra=eventfile.__dict__)
+    __slots__ = ('path', 'name', 'test_type', 'status', 'output', 'matched',
+                 'duration', 'triggered', 'error')
 
-        # restore original log level
-        log.setLevel(level)
+    def __init__(self, path, name=None, test_type=None):
 
+        # event file path, EVENT_NAME and TEST_TYPE
+        self.path = path
+        self.name = name
+        self.test_type = test_type
 
-def _eventlogger(logfile=None, loglevel=logging.WARNING):
-    """Configure event logger."""
+        # exit status and (truncated) output of COMMAND, or None if it was
+        # not executed
+        self.status = None
+        self.output = None
 
-    eventlogger = logging.getLogger('event')
+        # whether the test matched (None if the event was skipped)
+        self.matched = None
 
-    # ensure logger is not reconfigured
-    if not eventlogger.hasHandlers():
+        # seconds spent executing COMMAND (shared with other events)
+        self.duration = None
 
-        # set log level
-        eventlogger.setLevel(loglevel)
+        # whether the trigger succeeded (None unless it was executed)
+        self.triggered = None
 
-        fmt = '[%(basename)s] %(levelname)s: %(message)s'
+        # exception raised while processing the event (if any)
+        self.error = None
 
-        # configure terminal log
-        streamhandler = logging.StreamHandler()
-        streamhandler.setFormatter(logging.Formatter(fmt))
-        eventlogger.addHandler(streamhandler)
+    def __repr__(self):
+        return 'EventResult(%s)' % ', '.join(
+            '%s=%r' % (k, getattr(self, k)) for k in self.__slots__)
 
-        # configure log file (if necessary)
-        if logfile is not None:
-            fileformatter = logging.Formatter(
-                '%(asctime)s.%(msecs)03d ' + fmt,
-                '%Y-%m-%d %H:%M:%S')
-            filehandler = logging.FileHandler(logfile)
-            filehandler.setFormatter(fileformatter)
-            eventlogger.addHandler(filehandler)
 
+class TriggerRegistry:
 
-def _getstatus(args):
-    """Execute bash command returning exit status."""
-    import subprocess
+    """Share trigger definitions across events (reloading if modified)."""
 
-    try:
-        return subprocess.call(args,
-                               executable='bash',
-                               shell=True,
-                               stderr=subprocess.PIPE,
-                               stdout=subprocess.PIPE,
-                               timeout=20)
-    except subprocess.TimeoutExpired:
-        log = logging.getLogger(__program__)
-        log.error("Timed out executing '%s'", args)
-        return 1
+    def __init__(self, path=None):
 
+        # trigger config file path
+        self.path = path
 
-def _getstatusoutput(args):
-    """Execute bash command returning output and exit status."""
-    import subprocess
+        # trigger config file modification time
+        self.mtime = None
 
-    with subprocess.Popen(args,
-                          executable='bash',
-                          shell=True,
-                          stderr=subprocess.PIPE,
-                          stdout=subprocess.PIPE,
-                          universal_newlines=True) as process:
+        # trigger definitions keyed by name
+        self.triggers = {}
 
-        try:
-            status = process.wait(timeout=20)
-        except subprocess.TimeoutExpired:
-            log = logging.getLogger(__program__)
-            log.error("Timed out executing '%s'", args)
-            process.kill()
-            status = process.wait()
+        # undefined TRIGGER_NAMED references (name: event basenames)
+        self.undefined = {}
 
-        output = process.stdout.read().strip()
+        # undefined TRIGGER_NAMED references that were already reported
+        self.reported = set()
 
-        return status, output
+        self.refresh()
 
+    def check(self, eventfile):
+        """Record whether an event's TRIGGER_NAMED is defined."""
 
-def _parser(args, config):
-    """Parse script arguments and options."""
-    import argparse
-    import os
+        name = eventfile.data.get('TRIGGER_NAMED')
 
-    class SmartFormatter(argparse.HelpFormatter):
-        """Permit the use of raw text in help messages with 'r|' prefix."""
+        if name and not eventfile.data.get('TRIGGER_CUSTOM') and \
+           name not in self.triggers:
+            self.undefined.setdefault(name, set()).add(eventfile.basename)
 
-        def _split_lines(self, text, width):
-            """argparse.RawTextHelpFormatter._split_lines"""
-            if text.startswith('r|'):
-                return text[2:].splitlines()
-            return argparse.HelpFormatter._split_lines(self, text, width)
+    def get(self, name):
+        """Return the definition of trigger `name` (if any)."""
+        return self.triggers.get(name)
 
-    # pylint: disable=too-few-public-methods
-    class NegateAction(argparse.Action):
-        """Support --toggle and --no-toggle options."""
+    def refresh(self):
+        """Load the trigger config file unless it is unchanged."""
 
-        def __call__(self, parser, namespace, values, option_string=None):
-            setattr(namespace, self.dest, option_string[2:4] != 'no')
+        import os
 
-    def path(value):
-        """Ensure path is a directory or file-like object."""
-        if os.path.isdir(value):
-            return value
+        log = logging.getLogger(__program__)
 
         try:
-            with open(value) as file:
-                return file.name
-        except:
-            raise argparse.ArgumentTypeError(
-                "invalid path value: '%s'" % value)
+            mtime = os.stat(self.path).st_mtime_ns
+        except (OSError, TypeError):
+            mtime = None
 
-    parser = argparse.ArgumentParser(
-        add_help=False,
-        description=__description__,
-        formatter_class=SmartFormatter,
-        usage='%(prog)s [OPTION] <event files|folders>')
-    parser.add_argument(
-        '-f', '--file',
-        dest='config',
-        help='r|indicate trigger config file\n'
-             'Default: %s' % config,
-        type=argparse.FileType())
-    parser.add_argument(
-        '-h', '--help',
-        action='help',
-        help=argparse.SUPPRESS)
-    parser.add_argument(
-        '--parallel', '--no-parallel',
-        action=NegateAction,
-        default=None,
-        dest='parallel',
-        help='execute events in parallel (default)',
-        nargs=0)
-    parser.add_argument(
-        '--verify',
-        action='store_true',
-        dest='verify',
-        help='verify event files without execution')
-    parser.add_argument(
-        '--version',
-        action='version',
-        version='%(prog)s ' + __version__)
+        if mtime == self.mtime:
+            return
 
-    group = parser.add_argument_group('logging options')
-    group.add_argument(
-        '--debug',
-        action='store_true',
-        dest='debug',
-        help='set the logging level to debug')
-    group.add_argument(
-        '-l', '--log',
-        dest='logfile',
-        help='set log file destination')
-    group.add_argument(
-        '--verbose',
-        action='store_true',
-        dest='verbose',
-        help='set the logging level to verbose')
+        self.mtime = mtime
 
-    parser.add_argument(
-        dest='targets',
-        help=argparse.SUPPRESS,
-        nargs='*',
+        if mtime is None:
+            self.triggers = {}
+        else:
+            self.triggers = dict(_parse(self.path).items())
+
+        log.debug("Loaded %s triggers from '%s'",
+                  len(self.triggers), self.path)
+
+    def report(self):
+        """Log every undefined TRIGGER_NAMED reference not yet reported."""
+
+        log = logging.getLogger(__program__)
+
+        for name, basenames in sorted(self.undefined.items()):
+            references = sorted((name, b) for b in basenames)
+            if self.reported.issuperset(references):
+                continue
+            self.reported.update(references)
+            log.warning("TRIGGER_NAMED '%s' is not defined in '%s' "
+                        "(referenced by %s)", name, self.path,
+                        ', '.join(sorted(basenames)))
+
+        self.undefined = {}
+
+
+class TriggerPool:
+
+    """Execute triggers on a bounded pool separate from COMMAND execution."""
+
+    def __init__(self, jobs=8, timeout=20):
+
+        # maximum number of triggers executing concurrently
+        self.jobs = jobs
+
+        # default timeout (for events without TRIGGER_TIMEOUT)
+        self.timeout = timeout
+
+        # outstanding trigger tasks (see submit)
+        self.tasks = []
+
+        # bound per event loop (see start)
+        self.semaphore = None
+
+        # phase timings (Metrics)
+        self.metrics = Metrics()
+
+        # event loop time the run expires (None for no deadline)
+        self.expires = None
+
+        # persistent shell workers (_ShellPool)
+        self.shell = None
+
+    async def _attempt(self, trigger, args, timeout):
+        """
+        Execute a trigger command once a slot is free and return whether
+        it succeeded (or None if the deadline passed first).
+        """
+
+        import asyncio
+
+        async with self.semaphore:
+
+            # never run past the deadline
+            if self.expires is not None:
+                timeout = min(timeout,
+                              self.expires - asyncio.get_running_loop().time())
+                if timeout <= 0:
+                    log = logging.getLogger('event')
+                    log.error("Run deadline reached (trigger not executed)",
+                              extra=trigger.event.context)
+                    return None
+
+            with self.metrics.timer(trigger.event.path, 'trigger'):
+                return await _agetstatus(args, timeout, self.shell) == 0
+
+    async def _execute(self, trigger):
+        """Execute a trigger, retrying with the default upon failure."""
+
+        log = logging.getLogger('event')
+        log.info("Executing trigger (%s)", trigger.trigger_string,
+                 extra=trigger.event.context)
+
+        timeout = trigger.timeout(self.timeout)
+
+        success = await self._attempt(trigger, trigger.trigger_string,
+                                      timeout)
+
+        # the deadline passed before the trigger could be executed
+        if success is None:
+            return False
+
+        if trigger.report(success):
+            return True
+
+        # queue the retry behind triggers already waiting for a slot
+        if not trigger.is_default:
+            success = await self._attempt(trigger, trigger.fallback_string,
+                                          timeout)
+            return success is not None and \
+                trigger.report(success, retry=True)
+
+        return False
+
+    async def join(self):
+        """Await every submitted trigger and return those that succeeded."""
+
+        import asyncio
+
+        tasks, self.tasks = self.tasks, []
+        outcomes = await asyncio.gather(*[t for _, t in tasks],
+                                        return_exceptions=True)
+
+        log = logging.getLogger(__program__)
+
+        fired = []
+        for (trigger, _), outcome in zip(tasks, outcomes):
+            if isinstance(outcome, Exception):
+                log.error("Exception while executing trigger for '%s' "
+                          "(%s: %s)", trigger.event.path,
+                          type(outcome).__name__, outcome)
+            elif outcome:
+                fired.append(trigger)
+
+        return fired
+
+    def start(self, metrics=None, expires=None, shell=None):
+        """Prepare the pool for the running event loop."""
+
+        import asyncio
+
+        self.semaphore = asyncio.Semaphore(self.jobs)
+        self.tasks = []
+        self.expires = expires
+        self.shell = shell
+
+        if metrics is not None:
+            self.metrics = metrics
+
+    def submit(self, trigger):
+        """Schedule a trigger for execution without awaiting it."""
+
+        import asyncio
+
+        task = asyncio.ensure_future(self._execute(trigger))
+        self.tasks.append((trigger, task))
+        return task
+
+
+class Metrics:
+
+    """Record where the time spent processing events goes."""
+
+    phases = ('parse', 'verify', 'command', 'match', 'trigger', 'writer')
+
+    class Timer:
+
+        """Add the time spent in a `with` block to an event's phase."""
+
+        def __init__(self, metrics, path, phase):
+            self.metrics = metrics
+            self.path = path
+            self.phase = phase
+            self.started = None
+
+        def __enter__(self):
+            import time
+            self.started = time.perf_counter()
+            return self
+
+        def __exit__(self, *_):
+            import time
+            self.metrics.add(self.path, self.phase,
+                             time.perf_counter() - self.started)
+
+    def __init__(self, path=None):
+
+        import collections
+
+        # metrics file path (written in Prometheus textfile format if it
+        # ends with .prom, otherwise as JSON)
+        self.path = path
+
+        # phase durations of the latest run of each event keyed by path
+        self.events = {}
+
+        # phase durations summed over every run
+        self.totals = dict.fromkeys(self.phases, 0.0)
+
+        # number of events by outcome (and of executions and triggers)
+        self.counts = collections.Counter()
+
+        # number of runs, and duration and completion time of the latest
+        self.runs = 0
+        self.duration = None
+        self.timestamp = None
+
+        # time from the first COMMAND starting to the last one finishing
+        # in the latest run, and the shortest that permitted
+        self.makespan = None
+        self.ideal = None
+
+    def add(self, path, phase, seconds, shared=False):
+        """
+        Add `seconds` to an event's phase (unless `path` is None) and to
+        the totals (unless the time was shared with other events).
+        """
+
+        if path is not None:
+            phases = self.events.setdefault(path, {})
+            phases[phase] = phases.get(phase, 0.0) + seconds
+
+        if not shared:
+            self.totals[phase] += seconds
+
+    def count(self, name, number=1):
+        """Increase a count."""
+        self.counts[name] += number
+
+    def finish(self, duration, makespan=None, ideal=None):
+        """Record the completion of a run."""
+
+        import time
+
+        self.runs += 1
+        self.duration = duration
+        self.timestamp = time.time()
+        self.makespan = makespan
+        self.ideal = ideal
+
+    def json(self):
+        """Return the metrics as a JSON document."""
+
+        import json
+
+        return json.dumps({
+            'timestamp': self.timestamp,
+            'duration': self.duration,
+            'makespan': self.makespan,
+            'ideal_makespan': self.ideal,
+            'runs': self.runs,
+            'counts': self.counts,
+            'totals': self.totals,
+            'events': self.events
+            }, indent=2, sort_keys=True) + '\n'
+
+    def prometheus(self):
+        """Return the metrics in Prometheus text exposition format."""
+
+        def escape(value):
+            """Escape a label value."""
+            return value.replace('\\', r'\\').replace('"', r'\"') \
+                        .replace('\n', r'\n')
+
+        lines = []
+
+        def metric(name, kind, description, samples):
+            """Append a metric family."""
+            lines.append('# HELP %s_%s %s' % (__program__, name, description))
+            lines.append('# TYPE %s_%s %s' % (__program__, name, kind))
+            for labels, value in samples:
+                labels = ','.join('%s="%s"' % (k, escape(v))
+                                  for k, v in labels)
+                lines.append('%s_%s%s %r' % (
+                    __program__, name, '{%s}' % labels if labels else '',
+                    value))
+
+        metric('last_run_timestamp_seconds', 'gauge',
+               'Completion time of the latest run.',
+               [((), self.timestamp or 0.0)])
+        metric('last_run_duration_seconds', 'gauge',
+               'Duration of the latest run.',
+               [((), self.duration or 0.0)])
+        metric('last_run_makespan_seconds', 'gauge',
+               'Time from the first COMMAND starting to the last one '
+               'finishing in the latest run.',
+               [((), self.makespan or 0.0)])
+        metric('last_run_ideal_makespan_seconds', 'gauge',
+               'Shortest makespan the COMMANDs of the latest run permitted.',
+               [((), self.ideal or 0.0)])
+        metric('runs_total', 'counter', 'Number of runs.',
+               [((), self.runs)])
+        metric('phase_seconds_total', 'counter',
+               'Time spent in each phase over every run.',
+               [((('phase', p),), self.totals[p]) for p in self.phases])
+        metric('count_total', 'counter',
+               'Number of events by outcome and of executions and '
+               'triggers.',
+               [((('name', n),), self.counts[n]) for n in sorted(self.counts)])
+        metric('event_phase_seconds', 'gauge',
+               'Time spent in each phase of the latest run of an event.',
+               [((('event', e), ('phase', p)), s)
+                for e in sorted(self.events)
+                for p, s in sorted(self.events[e].items())])
+
+        return '\n'.join(lines) + '\n'
+
+    def start(self, path):
+        """Discard the phase durations of an event's previous run."""
+        self.events[path] = {}
+
+    def timer(self, path, phase):
+        """Return a context manager timing an event's phase."""
+        return self.Timer(self, path, phase)
+
+    def write(self):
+        """Write the metrics file atomically (if there is one)."""
+
+        import os
+        import tempfile
+
+        if self.path is None:
+            return
+
+        text = self.prometheus() if self.path.endswith('.prom') else \
+            self.json()
+
+        folder, name = os.path.split(os.path.abspath(self.path))
+
+        descriptor, temporary = tempfile.mkstemp(
+            dir=folder, prefix='.%s.' % name)
+        try:
+            with os.fdopen(descriptor, 'w') as file:
+                file.write(text)
+            os.chmod(temporary, 0o644)
+            os.replace(temporary, self.path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+
+class EventIndex:
+
+    """Cache parsed and verified event files keyed by file identity."""
+
+    # stored columns (a table of any other layout is replaced)
+    columns = ('path', 'inode', 'mtime', 'size', 'data', 'verified',
+               'status', 'version')
+
+    def __init__(self, path):
+
+        import os
+        import sqlite3
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.connection = sqlite3.connect(path, timeout=30)
+
+        layout = tuple(row[1] for row in self.connection.execute(
+            'PRAGMA table_info(events)'))
+        if layout and layout != self.columns:
+            with self.connection:
+                self.connection.execute('DROP TABLE events')
+
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS events ('
+            'path TEXT PRIMARY KEY, inode INTEGER, mtime INTEGER, '
+            'size INTEGER, data TEXT, verified INTEGER, status TEXT, '
+            'version TEXT)')
+
+        # cached entries keyed by path (loaded in a single query), except
+        # those stored by another version (which may parse or verify event
+        # files differently)
+        # (inode, mtime, size, data, verified, status)
+        self.entries = {
+            row[0]: row[1:-1] for row in self.connection.execute(
+                'SELECT %s FROM events' % ', '.join(self.columns))
+            if row[-1] == __version__}
+
+        # parsed event files (and file identities) awaiting storage
+        self.pending = []
+
+        # paths looked up during this run
+        self.seen = set()
+
+        # number of event files loaded without parsing
+        self.hits = 0
+
+    def load(self, path, config=None):
+        """Return event file at `path`, parsing it only if it changed."""
+
+        import json
+        import os
+
+        stat = os.stat(path)
+        identity = stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+        self.seen.add(path)
+
+        entry = self.entries.get(path)
+        if entry is not None and tuple(entry[:3]) == identity:
+
+            # filter out disabled and triggered events without decoding
+            # the rest of them
+            if entry[5] != 'enabled':
+                eventfile = EventFile(path, config,
+                                      EventRecord({'STATUS': entry[5]}))
+                eventfile.identity = identity
+                self.hits += 1
+                return eventfile
+
+            eventfile = EventFile(path, config,
+                                  EventRecord(json.loads(entry[3])))
+            eventfile.identity = identity
+            # verify failed event files again so that their problems are
+            # reported on every run (they are rare and cheap to verify)
+            eventfile.verified = True if entry[4] else None
+            self.hits += 1
+            return eventfile
+
+        eventfile = EventFile(path, config)
+        self.pending.append((eventfile, identity))
+
+        return eventfile
+
+    def commit(self):
+        """Store newly parsed event files and forget deleted ones."""
+
+        import json
+        import os
+
+        log = logging.getLogger(__program__)
+
+        rows = [(eventfile.path,) + identity + (
+            json.dumps(dict(eventfile.data.items())),
+            eventfile.verified,
+            eventfile.data.get('STATUS'),
+            __version__)
+                for eventfile, identity in self.pending]
+
+        gone = [(path,) for path in self.entries
+                if path not in self.seen and not os.path.exists(path)]
+
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO events VALUES (%s)' %
+                ', '.join('?' * len(self.columns)), rows)
+            self.connection.executemany(
+                'DELETE FROM events WHERE path = ?', gone)
+
+        log.debug("Indexed %s event files (%s cached, %s removed)",
+                  len(rows), self.hits, len(gone))
+
+        self.pending = []
+        self.hits = 0
+
+
+class RunState:
+
+    """
+    Record the last run of every event, to skip events that are not yet
+    due and to back off from events whose COMMAND keeps failing.
+    """
+
+    # stored columns (a table of any other layout is replaced)
+    columns = ('path', 'started', 'duration', 'status', 'digest', 'mtime',
+               'failures', 'jitter')
+
+    # seconds an event may be early and still be due (as cron starts
+    # each run a little late)
+    slack = 5
+
+    # fraction by which the delay before a run is randomly shortened
+    # (so that events sharing an INTERVAL drift apart)
+    spread = 0.1
+
+    # seconds the longest run must take for ordering events by duration
+    # to be worth finding every event before starting any
+    negligible = 1.0
+
+    def __init__(self, path, backoff=3600, interval=60):
+
+        import os
+        import sqlite3
+
+        # maximum number of seconds to back off from a failing event
+        self.backoff = backoff
+
+        # delay doubled after each failure (for events without INTERVAL)
+        self.interval = interval
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.connection = sqlite3.connect(path, timeout=30)
+
+        layout = tuple(row[1] for row in self.connection.execute(
+            'PRAGMA table_info(runs)'))
+        if layout and layout != self.columns:
+            with self.connection:
+                self.connection.execute('DROP TABLE runs')
+
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS runs ('
+            'path TEXT PRIMARY KEY, started REAL, duration REAL, '
+            'status INTEGER, digest TEXT, mtime INTEGER, '
+            'failures INTEGER, jitter REAL)')
+
+        # last runs keyed by path (loaded in a single query)
+        # (started, duration, status, digest, mtime, failures, jitter)
+        self.entries = {
+            row[0]: row[1:] for row in self.connection.execute(
+                'SELECT %s FROM runs' % ', '.join(self.columns))}
+
+        # runs awaiting storage
+        self.pending = []
+
+        # paths looked up during this run
+        self.seen = set()
+
+    def commit(self):
+        """Store recorded runs and forget deleted event files."""
+
+        import os
+
+        log = logging.getLogger(__program__)
+
+        gone = [(path,) for path in self.entries
+                if path not in self.seen and not os.path.exists(path)]
+
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                self.pending)
+            self.connection.executemany(
+                'DELETE FROM runs WHERE path = ?', gone)
+
+        for path, in gone:
+            del self.entries[path]
+
+        log.debug("Recorded %s runs (%s removed)", len(self.pending),
+                  len(gone))
+
+        self.pending = []
+        self.seen = set()
+
+    def delay(self, path, interval=None):
+        """
+        Return the number of seconds after its last run that an event is
+        due (None if it is always due). The delay doubles with every
+        consecutive failure, up to the maximum backoff.
+        """
+
+        entry = self.entries.get(path)
+        if entry is None:
+            return None
+
+        failures, jitter = entry[5:]
+
+        if failures:
+            delay = min((interval or self.interval) * 2 ** failures,
+                        max(interval or 0, self.backoff))
+        elif interval:
+            delay = interval
+        else:
+            return None
+
+        return delay * (1 - self.spread * jitter)
+
+    @staticmethod
+    def digest(output):
+        """Return a hash identifying `output`."""
+
+        import hashlib
+
+        return hashlib.blake2b(output.encode(errors='surrogateescape'),
+                               digest_size=16).hexdigest()
+
+    def failures(self, path):
+        """Return the number of consecutive failures of an event."""
+
+        entry = self.entries.get(path)
+
+        return 0 if entry is None else entry[5]
+
+    def expected(self, events):
+        """
+        Return the expected duration of each of `events` (paths or event
+        files), that of its last run. Events without a recorded run are
+        expected to take the median duration.
+        """
+
+        import statistics
+
+        durations = [e[1] for e in self.entries.values() if e[1] is not None]
+        default = statistics.median(durations) if durations else 0.0
+
+        expected = []
+        for event in events:
+            entry = self.entries.get(
+                event.path if isinstance(event, EventFile) else event)
+            expected.append(default if entry is None or entry[1] is None
+                            else entry[1])
+
+        return expected
+
+    def order(self, events, jobs=1, deadline=None):
+        """
+        Return `events` (paths or event files) in order of their expected
+        duration, longest first. If they are not expected to finish within
+        `deadline` seconds with `jobs` executing at once, order them
+        shortest first instead (to evaluate as many as possible before the
+        deadline), leaving those expected to take longer than it last.
+        """
+
+        events = list(events)
+        expected = self.expected(events)
+
+        if deadline is not None and expected and \
+           max(sum(expected) / jobs, max(expected)) > deadline:
+            order = sorted(range(len(events)), key=lambda i: (
+                expected[i] > deadline, expected[i]))
+        else:
+            order = sorted(range(len(events)), key=expected.__getitem__,
+                           reverse=True)
+
+        return [events[i] for i in order]
+
+    def ordering(self, jobs=1, deadline=None):
+        """
+        Check whether ordering events by their expected duration can
+        shorten a run (or fit more of it within `deadline` seconds) with
+        `jobs` executing at once, judging by the recorded runs.
+        """
+
+        durations = [e[1] for e in self.entries.values() if e[1] is not None]
+
+        # every event starts at once
+        if len(durations) <= jobs:
+            return False
+
+        if deadline is not None and sum(durations) / jobs > deadline:
+            return True
+
+        # ordering can save at most the longest duration
+        return max(durations) >= self.negligible
+
+    def record(self, eventfile, started, duration, status, digest=None,
+               failed=False):
+        """
+        Record a run of an event (stored on commit) and return its number
+        of consecutive failures. `failed` is True if COMMAND failed to
+        execute (it reached its own timeout or could not be started)
+        rather than exited with `status`, and None if it was cut short by
+        the run deadline (which is no failure of the event's own).
+        """
+
+        import os
+        import random
+
+        log = logging.getLogger('event')
+
+        path = eventfile.path
+
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        if failed is None:
+            # a run cut short says nothing of the event (beyond that it
+            # takes at least as long as it ran)
+            failures = self.failures(path)
+            entry = self.entries.get(path)
+            if entry is not None and entry[1] is not None:
+                duration = max(duration, entry[1])
+        else:
+            failures = self.failures(path) + 1 if failed else 0
+
+        self.seen.add(path)
+        self.entries[path] = (started, duration, status, digest, mtime,
+                              failures, random.random())
+        self.pending.append((path,) + self.entries[path])
+
+        if failed:
+            log.info("Backing off for %s seconds after %s consecutive "
+                     "failures (status %s)",
+                     round(self.delay(path, eventfile.interval(None))),
+                     failures, status, extra=eventfile.context)
+
+        return failures
+
+    def remaining(self, eventfile, now):
+        """
+        Return the number of seconds until an event is due again (0 if it
+        is due) at `now` (a Unix time). An event is always due once its
+        event file was modified.
+        """
+
+        import os
+
+        self.seen.add(eventfile.path)
+
+        entry = self.entries.get(eventfile.path)
+        delay = self.delay(eventfile.path, eventfile.interval(None))
+
+        # runs recorded in the future (the clock was set back) are ignored
+        if delay is None or entry[0] > now:
+            return 0
+
+        remaining = max(entry[0] + delay - now, 0)
+
+        try:
+            if remaining and os.stat(eventfile.path).st_mtime_ns != entry[4]:
+                return 0
+        except OSError:
+            return 0
+
+        return remaining
+
+    def waiting(self, eventfile, now):
+        """
+        Return why an event is not due at `now` (a Unix time), either
+        'backing_off' or 'not_due', or None if it is due.
+        """
+
+        log = logging.getLogger('event')
+
+        remaining = self.remaining(eventfile, now)
+        if remaining <= self.slack:
+            return None
+
+        failures = self.failures(eventfile.path)
+        if failures:
+            log.info("Backing off for another %s seconds after %s "
+                     "consecutive failures (skipping)", round(remaining),
+                     failures, extra=eventfile.context)
+            return 'backing_off'
+
+        log.info("Not due for another %s seconds (skipping)",
+                 round(remaining), extra=eventfile.context)
+        return 'not_due'
+
+
+class EventEngine:
+
+    """Execute event files concurrently on an asyncio event loop."""
+
+    def __init__(self, config=None, jobs=32, limit=16777216, index=None,
+                 triggers=None, pool=None, metrics=None, timeout=20,
+                 deadline=None, state=None, skip=True, locks=None,
+                 shell=None):
+
+        # trigger config file path
+        self.config = config
+
+        # phase timings and counts (Metrics)
+        self.metrics = Metrics() if metrics is None else metrics
+
+        # trigger execution pool (TriggerPool)
+        self.pool = TriggerPool() if pool is None else pool
+
+        # shared trigger definitions (TriggerRegistry)
+        self.triggers = TriggerRegistry(config) if triggers is None \
+            else triggers
+
+        # parsed event index (EventIndex)
+        self.index = index
+
+        # maximum number of events executing concurrently
+        self.jobs = jobs
+
+        # default maximum number of output bytes read per COMMAND
+        self.limit = limit
+
+        # default number of seconds each COMMAND may take
+        self.timeout = timeout
+
+        # number of seconds the whole run may take (None for no limit)
+        self.deadline = deadline
+
+        # event loop time the run expires (see _run)
+        self.expires = None
+
+        # last run of every event (RunState)
+        self.state = state
+
+        # whether to skip events that are not due (unless scheduled)
+        self.skip = skip
+
+        # event locks shared with other processes (_Lock)
+        self.locks = locks
+
+        # bytes of `locks` held keyed by event file path
+        self.locked = {}
+
+        # persistent shell workers shared with other runs (_ShellPool),
+        # otherwise the run starts and stops workers of its own
+        self.shared = shell
+        self.shell = None
+
+        # Unix time the run started (see _run)
+        self.now = None
+
+    def commit(self):
+        """Update the STATUS of events whose trigger was executed."""
+
+        for trigger in self.fired:
+            with self.metrics.timer(trigger.event.path, 'writer'):
+                trigger.writer()
+            self.unlock(trigger.event.path)
+
+        self.fired = []
+
+    def lock(self, eventfile):
+        """Lock an event against other processes and return whether it
+        was locked."""
+
+        import os
+
+        if self.locks is None:
+            return True
+
+        offset = _Lock.offset(os.path.realpath(eventfile.path))
+        if not self.locks.acquire(offset):
+            return False
+
+        self.locked[eventfile.path] = offset
+
+        return True
+
+    def makespan(self):
+        """
+        Return the time from the first COMMAND starting to the last one
+        finishing, and the shortest that their durations permitted with
+        `jobs` executing at once (None for both if none was executed).
+        """
+
+        executed = [e for e in self.executions if e.finished is not None]
+        if not executed:
+            return None, None
+
+        durations = [e.duration for e in executed]
+
+        return (max(e.finished for e in executed) -
+                min(e.started for e in executed),
+                max(sum(durations) / self.jobs, max(durations)))
+
+    def trigger(self, eventfile):
+        """Hand a matched event's trigger to the pool (rather than
+        awaiting it)."""
+        self.pool.submit(EventFile.TriggerFile(eventfile, self.triggers))
+
+    def unlock(self, path):
+        """Unlock an event (if it is locked)."""
+
+        offset = self.locked.pop(path, None)
+        if offset is not None:
+            self.locks.release(offset)
+
+    def _evaluated(self, eventfile, task):
+        """
+        Unlock an event once it is evaluated, unless it was triggered (it
+        is unlocked once its STATUS is updated).
+        """
+
+        if task.cancelled() or task.exception() is not None or \
+           not task.result():
+            self.unlock(eventfile.path)
+
+    async def _event(self, eventfile, execution, matcher):
+        """Evaluate an event against its COMMAND's shared execution."""
+
+        import asyncio
+
+        log = logging.getLogger('event')
+
+        # permit other events to keep awaiting the shared execution
+        result = await asyncio.shield(execution.task)
+
+        if result is None:
+            log.info("Run deadline reached before execution (skipping)",
+                     extra=eventfile.context)
+            return None
+
+        status, output = result
+
+        self.metrics.add(eventfile.path, 'command', execution.duration,
+                         shared=True)
+
+        if self.state is not None:
+            self.state.record(eventfile, self.now, execution.duration,
+                              status, execution.digest, execution.failed)
+
+        with self.metrics.timer(eventfile.path, 'match'):
+            if not eventfile.evaluate(status, output, matcher):
+                return False
+
+        self.trigger(eventfile)
+
+        return True
+
+    def _prepare(self, event):
+        """
+        Load and verify an event (path or event file), then attach it to
+        the execution of its COMMAND (starting one if necessary).
+        """
+
+        import asyncio
+
+        log = logging.getLogger('event')
+
+        path = event.path if isinstance(event, EventFile) else event
+
+        self.metrics.start(path)
+
+        with self.metrics.timer(path, 'parse'):
+            if isinstance(event, EventFile):
+                eventfile = event
+            elif self.index is not None:
+                eventfile = self.index.load(event, self.config)
+            else:
+                eventfile = EventFile(event, self.config)
+
+        log.info("Processing event", extra=eventfile.context)
+
+        self.triggers.check(eventfile)
+
+        with self.metrics.timer(path, 'verify'):
+            if not eventfile.ready():
+                return None
+
+        if self.state is not None and self.skip:
+            waiting = self.state.waiting(eventfile, self.now)
+            if waiting:
+                self.metrics.count(waiting)
+                return None
+
+        # never evaluate an event twice at once (e.g. in overlapping runs)
+        if not self.lock(eventfile):
+            log.info("Still being evaluated by another run (skipping)",
+                     extra=eventfile.context)
+            self.metrics.count('locked')
+            return None
+
+        # another run may have triggered the event (updating its STATUS
+        # and unlocking it) since it was parsed
+        if eventfile.changed():
+            log.debug("Reloading event file modified while locking",
+                      extra=eventfile.context)
+            eventfile.reload()
+            if not eventfile.ready():
+                self.unlock(eventfile.path)
+                return None
+
+        command = eventfile.data.get('COMMAND')
+        limit = eventfile.limit(self.limit)
+        timeout = eventfile.timeout(self.timeout)
+
+        # events share an execution of equivalent COMMANDs
+        key = _normalize(command), limit, timeout
+
+        # never attach to a finished execution (its output was already
+        # scanned and released), execute COMMAND again instead
+        execution = self.current.get(key)
+        if execution is None or execution.task.done():
+            execution = _Execution(command, limit, timeout)
+            execution.task = asyncio.ensure_future(
+                execution.run(self.semaphore, self.expires, self.shell))
+            self.current[key] = execution
+            self.executions.append(execution)
+
+        return eventfile, execution, execution.attach(eventfile)
+
+    async def _run(self, events):
+        """Execute all events and gather their results."""
+
+        import asyncio
+        import functools
+        import time
+
+        log = logging.getLogger(__program__)
+
+        started = time.perf_counter()
+        self.now = time.time()
+
+        # bound the number of COMMANDs executing concurrently
+        self.semaphore = asyncio.Semaphore(self.jobs)
+
+        # bound the number of events in flight (most of which are only
+        # awaiting a shared execution)
+        pending = asyncio.Semaphore(self.jobs * 8)
+
+        # COMMAND executions that events may still attach to keyed by
+        # (normalized COMMAND, output limit, timeout)
+        self.current = {}
+
+        # every COMMAND execution (in the order they were started)
+        self.executions = []
+
+        loop = asyncio.get_running_loop()
+        self.expires = None if self.deadline is None else \
+            loop.time() + self.deadline
+
+        # persistent workers for commands that need a shell
+        self.shell = _ShellPool() if self.shared is None else self.shared
+
+        self.pool.start(self.metrics, self.expires, self.shell)
+
+        self.triggers.refresh()
+
+        # dispatch the events expected to take longest first (so that no
+        # long COMMAND is left to start last), or shortest first if they
+        # will not all make the deadline. Unless events are already known
+        # (or ordering them cannot help), dispatch them as they are
+        # discovered instead.
+        if self.state is not None and (
+                isinstance(events, list) or
+                self.state.ordering(self.jobs, self.deadline)):
+            events = self.state.order(events, self.jobs, self.deadline)
+
+        dispatched = []
+        expired = 0
+        for event in events:
+
+            # skip the rest once the deadline has passed
+            if self.expires is not None and loop.time() >= self.expires:
+                dispatched.append((event, None))
+                expired += 1
+                continue
+
+            try:
+                prepared = self._prepare(event)
+            except Exception as exc:  # pylint: disable=broad-except
+                dispatched.append((event, exc))
+                continue
+
+            if prepared is None:
+                dispatched.append((event, None))
+                continue
+
+            await pending.acquire()
+            task = asyncio.ensure_future(self._event(*prepared))
+            task.add_done_callback(lambda _: pending.release())
+            task.add_done_callback(
+                functools.partial(self._evaluated, prepared[0]))
+            dispatched.append((event, task))
+
+            # permit the event to start while discovery continues
+            await asyncio.sleep(0)
+
+        # every event sharing each execution is now known
+        for execution in self.executions:
+            execution.close()
+
+        await asyncio.gather(
+            *[o for _, o in dispatched if isinstance(o, asyncio.Future)],
+            return_exceptions=True)
+
+        # count events whose COMMAND was still waiting for a slot
+        expired += sum(e.events for e in self.executions if e.expired)
+        if expired:
+            log.warning("Run deadline of %s seconds reached (skipped %s "
+                        "events)", self.deadline, expired)
+            self.metrics.count('expired', expired)
+
+        # successfully executed triggers (awaiting STATUS update)
+        self.fired = await self.pool.join()
+
+        self.metrics.count('triggers_fired', len(self.fired))
+
+        if self.shared is None:
+            await self.shell.close()
+
+        # update the STATUS of every triggered event at once
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.commit)
+
+        # unlock events whose trigger failed (or that were abandoned)
+        for path in list(self.locked):
+            self.unlock(path)
+
+        results = []
+        for event, outcome in dispatched:
+
+            if isinstance(outcome, asyncio.Future):
+                outcome = outcome.exception() or outcome.result()
+
+            if isinstance(outcome, Exception):
+                path = event.path if isinstance(event, EventFile) else event
+                log.error("Exception while processing '%s' (%s: %s)",
+                          path, type(outcome).__name__, outcome)
+
+            results.append(outcome)
+
+        attached = sum(e.events for e in self.executions)
+
+        for execution in self.executions:
+            self.metrics.add(None, 'command', execution.duration)
+
+        makespan, ideal = self.makespan()
+        if makespan is not None:
+            log.info("Executed commands in %.2f seconds (at best %.2f "
+                     "seconds with %s jobs)", makespan, ideal, self.jobs)
+
+        self.metrics.count('events', len(results))
+        self.metrics.count('triggered', results.count(True))
+        self.metrics.count('not_triggered', results.count(False))
+        self.metrics.count('skipped', results.count(None))
+        self.metrics.count('errors', sum(
+            isinstance(r, Exception) for r in results))
+        self.metrics.count('executions', len(self.executions))
+
+        log.info("Processed %s events", len(dispatched))
+        log.info("Executed %s distinct commands for %s events "
+                 "(%s executions saved)", len(self.executions), attached,
+                 attached - len(self.executions))
+
+        if self.index is not None:
+            self.index.commit()
+
+        if self.state is not None:
+            self.state.commit()
+
+        self.triggers.report()
+
+        self.metrics.finish(time.perf_counter() - started, makespan, ideal)
+
+        return results
+
+    def run(self, events, loop=None):
+        """
+        Execute `events` (paths or event files) and return a list of
+        results: True (triggered), False (not triggered), None (skipped)
+        or the exception raised while processing the event. The run takes
+        place on `loop` if given (e.g. one shared with other runs).
+        """
+
+        import asyncio
+
+        if loop is None:
+            results = asyncio.run(self._run(events))
+        else:
+            results = loop.run_until_complete(self._run(events))
+
+        self.metrics.write()
+
+        return results
+
+
+class _Evaluation(EventEngine):
+
+    """Execute event files, collecting an EventResult for each."""
+
+    def __init__(self, execute, output, *args, **kwargs):
+
+        super().__init__(*args, **kwargs)
+
+        # whether to execute the triggers of matched events
+        self.execute = execute
+
+        # maximum number of output characters kept per result
+        self.output = output
+
+        # results keyed by event file path
+        self.results = {}
+
+    def commit(self):
+        """Note which triggers succeeded and update their STATUS."""
+
+        for trigger in self.fired:
+            self.results[trigger.event.path].triggered = True
+
+        super().commit()
+
+    async def _event(self, eventfile, execution, matcher):
+        """Evaluate an event and record its result."""
+
+        matched = await super()._event(eventfile, execution, matcher)
+
+        # the run deadline passed before COMMAND could start
+        if matched is None:
+            return None
+
+        status, output = execution.task.result()
+
+        result = self.results[eventfile.path]
+        result.status = status
+        result.output = _truncate(output, self.output)
+        result.matched = matched
+        result.duration = execution.duration
+        if matched and self.execute:
+            result.triggered = False
+
+        return matched
+
+    def _prepare(self, event):
+        """Load an event, noting its result, and prepare it."""
+
+        eventfile = EventFile(event, self.config)
+
+        self.results[event] = EventResult(
+            event, eventfile.data.get('EVENT_NAME'),
+            eventfile.data.get('TEST_TYPE'))
+
+        return super()._prepare(eventfile)
+
+    def trigger(self, eventfile):
+        """Hand a matched event's trigger to the pool (if executing
+        triggers)."""
+
+        if self.execute:
+            super().trigger(eventfile)
+
+
+class _Execution:
+
+    """Execute a COMMAND once for every event that shares it."""
+
+    def __init__(self, command, limit, timeout=20):
+
+        # COMMAND (as written in the first event sharing it)
+        self.command = command
+
+        # maximum number of output bytes read
+        self.limit = limit
+
+        # number of seconds COMMAND may take
+        self.timeout = timeout
+
+        # number of dependent events
+        self.events = 0
+
+        # streaming content matchers of dependent events
+        self.matchers = []
+
+        # regex matchers of dependent events (searched for together once
+        # output is complete)
+        self.patterns = []
+
+        # end of previous chunk (to find literals spanning chunks)
+        self.tail = b''
+
+        # whether a dependent event needs the complete output and status
+        self.complete = False
+
+        # whether every dependent event is known
+        self.closed = False
+
+        # output retained while it may still be needed
+        self.chunks = []
+        self.retain = True
+
+        # task resolving to (status, output)
+        self.task = None
+
+        # seconds spent executing COMMAND, and performance counter
+        # values when it started and finished (None unless executed)
+        self.duration = 0.0
+        self.started = self.finished = None
+
+        # hash of the output (None unless it was retained)
+        self.digest = None
+
+        # whether the run deadline passed before COMMAND could start
+        self.expired = False
+
+        # whether COMMAND failed to execute (it reached its own timeout or
+        # could not be started), or None if the run deadline cut it short
+        self.failed = False
+
+    def attach(self, eventfile):
+        """Register a dependent event and return its streaming matcher."""
+
+        # output is only scanned for matchers attached before it finished
+        if self.task is not None and self.task.done():
+            raise ValueError("execution of '%s' has already finished" %
+                             self.command)
+
+        self.events += 1
+
+        matcher = eventfile.matcher()
+
+        if matcher is None:
+            self.complete = True
+        elif matcher.regex:
+            self.complete = True
+            self.patterns.append(matcher)
+        else:
+            # literals are searched for together (see feed)
+            matcher.shared = matcher.pattern is not None
+
+            # catch up with output that has already been read, searching
+            # it for literals (keeping the longer end of it) and feeding
+            # it to the matcher (which decides null and not_null)
+            self.tail = max(self.tail, self.scan([matcher], self.chunks),
+                            key=len)
+            for chunk in self.chunks:
+                matcher.feed(chunk)
+            self.matchers.append(matcher)
+
+        return matcher
+
+    def close(self):
+        """Stop retaining output unless a dependent event needs it."""
+
+        self.closed = True
+
+        if not self.complete:
+            self.chunks = []
+            self.retain = False
+
+    def feed(self, chunk):
+        """Consume a chunk of output and return whether to stop early."""
+
+        if self.retain:
+            self.chunks.append(chunk)
+
+        self.tail = self.scan(self.matchers, [chunk], self.tail)
+
+        decided = [matcher.feed(chunk) for matcher in self.matchers]
+
+        return self.closed and not self.complete and all(decided)
+
+    async def run(self, semaphore, expires=None, shell=None):
+        """
+        Execute COMMAND and return its status and (retained) output, or
+        None if `expires` (an event loop time) passed before it could
+        start. The timeout is shortened so that COMMAND never runs past
+        `expires`.
+        """
+
+        import asyncio
+        import time
+
+        async with semaphore:
+
+            timeout = self.timeout
+            if expires is not None:
+                timeout = min(timeout,
+                              expires - asyncio.get_running_loop().time())
+                if timeout <= 0:
+                    self.expired = True
+                    return None
+
+            def failed(reason):
+                """Tell the event's own failure from the deadline's."""
+                own = reason != 'timeout' or timeout >= self.timeout
+                self.failed = True if own else None
+
+            self.started = time.perf_counter()
+            status, _ = await _agetstatusoutput(
+                self.command, timeout, self.limit, self, shell, failed)
+            self.finished = time.perf_counter()
+            self.duration = self.finished - self.started
+
+        output = b''.join(self.chunks).decode(errors='replace').strip()
+
+        if self.retain:
+            self.digest = RunState.digest(output)
+
+        self.chunks = []
+
+        # scan output once for every regex
+        found = _search([m.pattern for m in self.patterns], output)
+        for index, matcher in enumerate(self.patterns):
+            matcher.found = index in found
+
+        return status, output
+
+    @staticmethod
+    def scan(matchers, chunks, tail=b''):
+        """
+        Search `chunks` (following `tail`) for the literals of `matchers`
+        that are still outstanding, scanning each chunk once for all of
+        them, and return the end of output needed to continue.
+        """
+
+        for chunk in chunks:
+
+            outstanding = [m for m in matchers if m.shared and not m.found]
+            if not outstanding:
+                break
+
+            window = tail + chunk
+            for index in _search([m.pattern for m in outstanding], window):
+                outstanding[index].found = True
+
+            keep = max(len(m.match) for m in outstanding) - 1
+            tail = window[-keep:] if keep else b''
+
+        return tail
+
+
+class EventRunner:
+
+    """Execute event file."""
+
+    def __init__(self, path, config=None, triggers=None, metrics=None,
+                 state=None):
+
+        import time
+
+        log = logging.getLogger('event')
+
+        # phase timings (Metrics)
+        metrics = Metrics() if metrics is None else metrics
+
+        name = path.path if isinstance(path, EventFile) else path
+        metrics.start(name)
+
+        # permit reuse of an event file that is already loaded
+        with metrics.timer(name, 'parse'):
+            eventfile = path if isinstance(path, EventFile) else \
+                EventFile(path, config)
+
+        log.info("Processing event", extra=eventfile.context)
+
+        with metrics.timer(name, 'verify'):
+            if not eventfile.ready():
+                return
+
+        now = time.time()
+
+        if state is not None and state.waiting(eventfile, now):
+            return
+
+        matcher = eventfile.matcher()
+
+        failures = []
+
+        with metrics.timer(name, 'command'):
+            status, output = _getstatusoutput(
+                eventfile.data.get('COMMAND'), timeout=eventfile.timeout(),
+                limit=eventfile.limit(), matcher=matcher,
+                failed=failures.append)
+
+        # runs are stored once `state` is committed (output is only
+        # retained without a streaming matcher)
+        if state is not None:
+            state.record(eventfile, now, time.time() - now, status,
+                         None if matcher is not None else
+                         RunState.digest(output), bool(failures))
+
+        with metrics.timer(name, 'match'):
+            if not eventfile.evaluate(status, output, matcher):
+                return
+
+        trigger = EventFile.TriggerFile(eventfile, triggers)
+
+        with metrics.timer(name, 'trigger'):
+            success = trigger.execute(False)
+
+        if success:
+            with metrics.timer(name, 'writer'):
+                trigger.writer()
+
+
+class EventScheduler:
+
+    """Run event files on their own interval from a resident process."""
+
+    def __init__(self, paths, config=None, interval=60, jobs=32,
+                 limit=16777216, triggers=None, pool=None, metrics=None,
+                 timeout=20, deadline=None, state=None, locks=None):
+
+        import itertools
+        import time
+
+        # trigger config file path
+        self.config = config
+
+        # default interval (for events without INTERVAL)
+        self.interval = interval
+
+        # maximum number of due events executing concurrently
+        self.jobs = jobs
+
+        # default maximum number of output bytes read per COMMAND
+        self.limit = limit
+
+        # default number of seconds each COMMAND may take
+        self.timeout = timeout
+
+        # number of seconds each batch may take (None for no limit)
+        self.deadline = deadline
+
+        # shared trigger definitions (TriggerRegistry)
+        self.triggers = TriggerRegistry(config) if triggers is None \
+            else triggers
+
+        # trigger execution pool (TriggerPool)
+        self.pool = TriggerPool() if pool is None else pool
+
+        # phase timings and counts accumulated over every batch (Metrics)
+        self.metrics = Metrics() if metrics is None else metrics
+
+        # last run of every event (RunState)
+        self.state = state
+
+        # event locks shared with other processes (_Lock)
+        self.locks = locks
+
+        # event loop and shell workers kept between batches (started by
+        # the first batch)
+        self.loop = None
+        self.shell = None
+
+        # loaded events keyed by path
+        # (event file, modification time, sequence of its heap entry)
+        self.events = {}
+
+        # heap of (due time, sequence, path)
+        self.queue = []
+
+        # tie-breaker ensuring heap entries never compare paths
+        # (also identifies stale heap entries)
+        self.sequence = itertools.count()
+
+        now = time.monotonic()
+        for path in paths:
+            self.add(path, now)
+
+    def active(self, eventfile):  # pylint: disable=W0613
+        """Check whether an event file should stay scheduled."""
+
+        # keep every event scheduled (STATUS changes are only noticed
+        # when the event file is loaded)
+        return True
+
+    def add(self, path, due):
+        """Load an event file and schedule it at `due` (if not None)."""
+
+        import os
+
+        log = logging.getLogger(__program__)
+
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            eventfile = EventFile(path, self.config)
+        except Exception as exc:  # pylint: disable=broad-except
+            log.error("Unable to load '%s' (%s)", path, exc)
+            self.events.pop(path, None)
+            return None
+
+        self.events[path] = [eventfile, mtime, None]
+        if due is not None:
+            self.schedule(path, due + self.remaining(eventfile))
+
+        return eventfile
+
+    def load(self, path):
+        """Return the event file at `path`, reloading it if modified."""
+
+        import os
+
+        log = logging.getLogger(__program__)
+
+        eventfile, mtime, _ = self.events[path]
+
+        try:
+            current = os.stat(path).st_mtime_ns
+        except OSError:
+            log.warning("Event file '%s' is gone (unscheduling)", path)
+            self.remove(path)
+            return None
+
+        if current != mtime:
+            log.debug("Reloading modified event file '%s'", path)
+            eventfile = EventFile(path, self.config)
+            self.events[path][:2] = eventfile, current
+
+        return eventfile
+
+    def remaining(self, eventfile):
+        """Return the number of seconds until an event is due again."""
+
+        import time
+
+        if self.state is None:
+            return 0
+
+        return self.state.remaining(eventfile, time.time())
+
+    def remove(self, path):
+        """Forget an event file (its heap entry becomes stale)."""
+        self.events.pop(path, None)
+
+    def schedule(self, path, due):
+        """Schedule a loaded event file at `due` (replacing any entry)."""
+
+        import heapq
+
+        sequence = next(self.sequence)
+        self.events[path][2] = sequence
+        heapq.heappush(self.queue, (due, sequence, path))
+
+    def delay(self, eventfile):
+        """
+        Return the number of seconds between runs of an event (its
+        INTERVAL, randomly shortened and lengthened by any backoff).
+        """
+
+        import random
+
+        interval = eventfile.interval(self.interval)
+
+        if self.state is None:
+            return interval * (1 - RunState.spread * random.random())
+
+        return self.state.delay(eventfile.path, interval) or interval
+
+    def close(self):
+        """Stop the shell workers and close the event loop."""
+
+        import asyncio
+
+        if self.loop is None:
+            return
+
+        # cancel whatever an interrupted batch left behind
+        tasks = asyncio.all_tasks(self.loop)
+        for task in tasks:
+            task.cancel()
+        self.loop.run_until_complete(
+            asyncio.gather(*tasks, return_exceptions=True))
+
+        self.loop.run_until_complete(self.shell.close())
+        if hasattr(self.loop, 'shutdown_default_executor'):
+            self.loop.run_until_complete(
+                self.loop.shutdown_default_executor())
+
+        asyncio.set_event_loop(None)
+        self.loop.close()
+        self.loop = self.shell = None
+
+    def dispatch(self, eventfiles):
+        """Execute a batch of due event files."""
+
+        import asyncio
+
+        # keep shell workers warm between batches (on one event loop, as
+        # they are bound to the loop that started them)
+        if self.loop is None:
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+            self.shell = _ShellPool()
+
+        EventEngine(self.config, self.jobs, self.limit,
+                    triggers=self.triggers, pool=self.pool,
+                    metrics=self.metrics, timeout=self.timeout,
+                    deadline=self.deadline, state=self.state,
+                    skip=False, locks=self.locks,
+                    shell=self.shell).run(eventfiles, self.loop)
+
+    def wait(self, delay):
+        """Wait up to `delay` seconds and return whether to continue."""
+
+        import time
+
+        # nothing will ever become due
+        if delay is None:
+            return False
+
+        time.sleep(delay)
+
+        return True
+
+    def run(self):
+        """Execute events as they become due until interrupted."""
+
+        import heapq
+        import signal
+        import time
+
+        log = logging.getLogger(__program__)
+
+        # ensure SIGTERM stops the daemon as cleanly as SIGINT
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+        log.info("Scheduling %s events", len(self.events))
+
+        try:
+            while True:
+
+                delay = self.queue[0][0] - time.monotonic() \
+                    if self.queue else None
+                if delay is None or delay > 0:
+                    if not self.wait(delay):
+                        break
+                    continue
+
+                # collect every event that is due
+                now = time.monotonic()
+                due = []
+                while self.queue and self.queue[0][0] <= now:
+                    due.append(heapq.heappop(self.queue))
+
+                batch = []
+                for scheduled, sequence, path in due:
+
+                    # skip entries of removed or rescheduled events
+                    if path not in self.events or \
+                       self.events[path][2] != sequence:
+                        continue
+
+                    eventfile = self.load(path)
+                    if eventfile is None or not self.active(eventfile):
+                        continue
+                    batch.append((scheduled, eventfile))
+
+                if batch:
+                    self.dispatch([e for _, e in batch])
+
+                for scheduled, eventfile in batch:
+                    if eventfile.path not in self.events:
+                        continue
+
+                    # keep the schedule's phase unless we fell behind
+                    # (backing off from events whose COMMAND failed)
+                    interval = self.delay(eventfile)
+                    following = scheduled + interval
+                    if following <= now:
+                        following = now + interval
+                    self.schedule(eventfile.path, following)
+
+        except KeyboardInterrupt:
+            log.info("Stopping daemon")
+
+        finally:
+            self.close()
+
+
+class EventWatcher(EventScheduler):
+
+    """Run event files on their own interval, tracking changes to event
+    folders with inotify rather than rescanning them."""
+
+    def __init__(self, targets, config=None, interval=60, jobs=32,
+                 limit=16777216, triggers=None, include=None, exclude=None,
+                 maxdepth=None, pool=None, metrics=None, timeout=20,
+                 deadline=None, state=None, shard=None, locks=None):
+
+        import os
+
+        # event file filters (see iterate_paths)
+        self.include = include or ['*.conf', '*.txt']
+        self.exclude = exclude or []
+        self.maxdepth = maxdepth
+        self.shard = shard
+
+        self.inotify = _Inotify()
+
+        # watched folders keyed by watch descriptor (target, folder, depth)
+        self.folders = {}
+
+        # watch folders before searching them (so no change is missed)
+        targets = list(targets)
+        for target in targets:
+            if os.path.isdir(target):
+                self.watch(target, target, 1)
+
+        super().__init__(
+            iterate_paths(targets, include, exclude, maxdepth, shard),
+            config, interval, jobs, limit, triggers, pool, metrics,
+            timeout, deadline, state, locks)
+
+    def changed(self, path, target):
+        """Load, reload or forget an event file after it changed."""
+
+        import os
+        import time
+
+        log = logging.getLogger(__program__)
+
+        name = os.path.basename(path)
+        relative = os.path.relpath(path, target)
+
+        try:
+            eligible = os.path.isfile(path) and \
+                not os.path.islink(path) and \
+                _globmatch(self.include, name, relative) and \
+                not _globmatch(self.exclude, name, relative) and \
+                (self.shard is None or
+                 _shard(relative, self.shard[1]) == self.shard[0]) and \
+                os.path.getsize(path) > 0 and \
+                os.access(path, os.R_OK | os.W_OK)
+        except OSError:
+            eligible = False
+
+        if not eligible:
+            if path in self.events:
+                log.info("Event file '%s' removed (unscheduling)", path)
+                self.remove(path)
+            return
+
+        known = path in self.events
+
+        # load (or reload) and run immediately if enabled
+        eventfile = self.add(path, None)
+        if eventfile is None:
+            return
+
+        log.info("Event file '%s' %s (STATUS is %s)", path,
+                 'modified' if known else 'added',
+                 eventfile.data.get('STATUS'))
+
+        if eventfile.enabled:
+            self.schedule(path, time.monotonic())
+
+    def active(self, eventfile):
+        """Check whether an event file should stay scheduled."""
+
+        # disabled events are rescheduled once their event file changes
+        return eventfile.enabled
+
+    def handle(self):
+        """Apply pending inotify events to the event table."""
+
+        import os
+
+        log = logging.getLogger(__program__)
+
+        for descriptor, mask, name in self.inotify.read():
+
+            if mask & _Inotify.IN_Q_OVERFLOW:
+                log.warning("inotify queue overflowed (rescanning)")
+                self.rescan()
+                continue
+
+            if mask & _Inotify.IN_IGNORED:
+                self.folders.pop(descriptor, None)
+                continue
+
+            if descriptor not in self.folders:
+                continue
+
+            target, folder, depth = self.folders[descriptor]
+            path = os.path.join(folder, name)
+
+            if mask & _Inotify.IN_ISDIR:
+                if mask & (_Inotify.IN_CREATE | _Inotify.IN_MOVED_TO):
+                    if self.maxdepth is None or depth < self.maxdepth:
+                        self.watch(target, path, depth + 1)
+                        # search only as deep as the target's maximum depth
+                        for child in iterate_paths(
+                                [path], self.include, self.exclude,
+                                None if self.maxdepth is None else
+                                self.maxdepth - depth):
+                            self.changed(child, target)
+                elif mask & (_Inotify.IN_DELETE | _Inotify.IN_MOVED_FROM):
+                    prefix = os.path.join(path, '')
+                    for child in [p for p in self.events
+                                  if p.startswith(prefix)]:
+                        self.changed(child, target)
+                    for other, watched in list(self.folders.items()):
+                        if os.path.join(watched[1], '').startswith(prefix):
+                            self.inotify.remove(other)
+                            del self.folders[other]
+            elif name:
+                self.changed(path, target)
+
+    def rescan(self):
+        """Reconcile the event table with the event folders."""
+
+        import os
+
+        targets = {t for t, _, _ in self.folders.values()}
+        found = set(iterate_paths(sorted(targets), self.include,
+                                  self.exclude, self.maxdepth))
+
+        for target in targets:
+            for path in found | set(self.events):
+                if path.startswith(os.path.join(target, '')):
+                    self.changed(path, target)
+
+    def watch(self, target, folder, depth):
+        """Watch a folder (and its subfolders within the maximum depth)."""
+
+        import os
+
+        log = logging.getLogger(__program__)
+
+        try:
+            descriptor = self.inotify.add(folder, _Inotify.MASK)
+        except OSError as exc:
+            log.error("Unable to watch '%s' (%s)", folder, exc)
+            return
+
+        self.folders[descriptor] = target, folder, depth
+
+        if self.maxdepth is not None and depth >= self.maxdepth:
+            return
+
+        try:
+            with os.scandir(folder) as iterator:
+                subfolders = [e.path for e in iterator
+                              if e.is_dir(follow_symlinks=False)]
+        except OSError:
+            return
+
+        for subfolder in sorted(subfolders):
+            self.watch(target, subfolder, depth + 1)
+
+    def wait(self, delay):
+        """Wait up to `delay` seconds, handling changes to event folders."""
+
+        import select
+
+        readable, _, _ = select.select([self.inotify], [], [], delay)
+
+        if readable:
+            self.handle()
+
+        return True
+
+
+class EventVerifier:
+
+    """Verify event file."""
+
+    def __init__(self, path, config=None, triggers=None):
+
+        log = logging.getLogger('event')
+
+        eventfile = EventFile(path, config)
+
+        log.info("Verifying only", extra=eventfile.context)
+
+        if triggers is not None:
+            triggers.check(eventfile)
+
+        # store the original log level
+        level = log.getEffectiveLevel()
+
+        # ensure verification messages are displayed
+        log.setLevel(logging.INFO)
+
+        status = eventfile.verify()
+
+        # initialize trigger (to display configuration warnings)
+        EventFile.TriggerFile(eventfile, triggers)
+
+        if status:
+            log.info("Verification OK", extra=eventfile.context)
+        else:
+            log.info("Verification NOT OK", extra=eventfile.context)
+
+        # restore original log level
+        log.setLevel(level)
+
+
+class _Output:
+
+    """COMMAND output passed to a log call (truncated when logged)."""
+
+    __slots__ = ('value',)
+
+    class Truncate(logging.Filter):
+
+        """Truncate logged output to `limit` characters."""
+
+        def __init__(self, limit=None):
+            super().__init__()
+            self.limit = limit
+
+        def filter(self, record):
+            """Replace output arguments with their truncated text."""
+            if self.limit is not None and isinstance(record.args, tuple):
+                record.args = tuple(
+                    _truncate(str(a), self.limit)
+                    if isinstance(a, _Output) else a for a in record.args)
+            return True
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return str(self.value)
+
+
+class _ShellPool:
+
+    """Execute shell commands on persistent bash workers rather than
+    starting bash for every command."""
+
+    # read a FIFO path and a command (NUL terminated), run the command in
+    # its own process group writing to the FIFO, then report its PID and
+    # exit status (one per line)
+    script = r'''
+set -m
+while IFS= read -r -d '' __triggerd_fifo &&
+      IFS= read -r -d '' __triggerd_command; do
+    exec 3>"$__triggerd_fifo"
+    ( set +m; eval "$__triggerd_command" ) >&3 2>/dev/null </dev/null &
+    exec 3>&-
+    printf '%s\n' "$!"
+    wait "$!"
+    printf '%s\n' "$?"
+done
+'''
+
+    class Job:
+
+        """A command running on a worker (quacks like an asyncio
+        Process for _agetstatusoutput)."""
+
+        def __init__(self, pid, stdout, transport, status):
+            self.pid = pid
+            self.stdout = stdout
+            self.transport = transport
+            self.status = status
+
+        def close(self):
+            """Close the output FIFO (even if output was left unread)."""
+            self.transport.close()
+
+        @property
+        def returncode(self):
+            """Return the exit status (None until known)."""
+            return self.status.result() if self.status.done() else None
+
+        async def wait(self):
+            """Await and return the exit status."""
+            import asyncio
+            return await asyncio.shield(self.status)
+
+    def __init__(self):
+
+        import itertools
+        import tempfile
+
+        # idle workers (asyncio processes)
+        self.idle = []
+
+        # every worker started
+        self.workers = []
+
+        # folder holding one FIFO per job
+        self.folder = tempfile.mkdtemp(prefix='%s.' % __program__)
+        self.sequence = itertools.count()
+
+    async def close(self):
+        """Stop every worker."""
+
+        import asyncio
+        import os
+
+        for worker in self.workers:
+            worker.stdin.close()
+
+        await asyncio.gather(*[w.wait() for w in self.workers],
+                             return_exceptions=True)
+
+        self.idle = []
+        self.workers = []
+
+        os.rmdir(self.folder)
+
+    async def spawn(self, command):
+        """Start `command` on an idle worker and return its job."""
+
+        import asyncio
+        import os
+        import subprocess
+
+        if self.idle:
+            worker = self.idle.pop()
+        else:
+            worker = await asyncio.create_subprocess_exec(
+                'bash', '-c', self.script,
+                start_new_session=True,
+                stderr=subprocess.DEVNULL,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE)
+            self.workers.append(worker)
+
+        fifo = os.path.join(self.folder, str(next(self.sequence)))
+        os.mkfifo(fifo, 0o600)
+
+        # open the reading end first so that the worker can open the
+        # writing end without blocking
+        descriptor = os.open(fifo, os.O_RDONLY | os.O_NONBLOCK)
+
+        try:
+            request = b'%s\0%s\0' % (fifo.encode(), command.encode())
+            worker.stdin.write(request)
+            await worker.stdin.drain()
+
+            # the worker has opened the FIFO once it reports the PID
+            pid = int(await worker.stdout.readline())
+        except (OSError, ValueError):
+            os.close(descriptor)
+            if worker.returncode is None:
+                worker.kill()
+            self.workers.remove(worker)
+            raise OSError('shell worker failed')
+        finally:
+            os.unlink(fifo)
+
+        loop = asyncio.get_running_loop()
+
+        stdout = asyncio.StreamReader(limit=2 ** 20)
+        transport, _ = await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(stdout),
+            os.fdopen(descriptor, 'rb', 0))
+
+        async def status():
+            """Await the exit status and return the worker to the pool."""
+            line = await worker.stdout.readline()
+            if not line:
+                self.workers.remove(worker)
+                return 255
+            self.idle.append(worker)
+            return int(line)
+
+        return self.Job(pid, stdout, transport,
+                        asyncio.ensure_future(status()))
+
+
+class _Lock:
+
+    """
+    Hold advisory (POSIX record) locks on single bytes of a lock file,
+    so that other processes are kept from holding the same ones.
+    """
+
+    def __init__(self, path):
+
+        import os
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # lock file descriptor (closing it releases every lock)
+        self.descriptor = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    def acquire(self, offset=0, wait=False):
+        """Return whether a byte was locked (waiting for it if `wait`)."""
+
+        import errno
+        import fcntl
+
+        try:
+            fcntl.lockf(self.descriptor,
+                        fcntl.LOCK_EX | (0 if wait else fcntl.LOCK_NB),
+                        1, offset)
+        except OSError as exc:
+            if exc.errno in (errno.EACCES, errno.EAGAIN):
+                return False
+            raise
+
+        return True
+
+    def close(self):
+        """Release every lock."""
+
+        import os
+
+        os.close(self.descriptor)
+
+    @staticmethod
+    def offset(key):
+        """Return the byte standing for `key` (e.g. an event file path)."""
+
+        import hashlib
+
+        return int.from_bytes(hashlib.blake2b(
+            key.encode(errors='surrogateescape'), digest_size=7).digest(),
+                              'big')
+
+    def release(self, offset=0):
+        """Unlock a byte."""
+
+        import fcntl
+
+        fcntl.lockf(self.descriptor, fcntl.LOCK_UN, 1, offset)
+
+
+class _Inotify:
+
+    """Minimal ctypes binding to the Linux inotify API."""
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+
+    IN_CLOEXEC = 0o2000000
+    IN_NONBLOCK = 0o4000
+
+    # changes relevant to event folders
+    MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_CREATE | IN_DELETE | \
+        IN_MOVED_FROM | IN_MOVED_TO | IN_ONLYDIR
+
+    def __init__(self):
+
+        import ctypes
+        import ctypes.util
+        import os
+
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or
+                                'libc.so.6', use_errno=True)
+
+        self.fd = self.libc.inotify_init1(self.IN_CLOEXEC | self.IN_NONBLOCK)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+    def add(self, path, mask):
+        """Watch `path` and return its watch descriptor."""
+
+        import ctypes
+        import os
+
+        descriptor = self.libc.inotify_add_watch(
+            self.fd, os.fsencode(path), ctypes.c_uint32(mask))
+        if descriptor < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+
+        return descriptor
+
+    def fileno(self):
+        """Return the inotify file descriptor (for select)."""
+        return self.fd
+
+    def read(self):
+        """Return pending (watch descriptor, mask, name) events."""
+
+        import os
+        import struct
+
+        events = []
+
+        while True:
+            try:
+                buffer = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return events
+
+            offset = 0
+            while offset < len(buffer):
+                descriptor, mask, _, length = struct.unpack_from(
+                    'iIII', buffer, offset)
+                offset += struct.calcsize('iIII')
+                name = buffer[offset:offset + length].rstrip(b'\0')
+                offset += length
+                events.append((descriptor, mask, os.fsdecode(name)))
+
+    def remove(self, descriptor):
+        """Stop watching a watch descriptor."""
+        self.libc.inotify_rm_watch(self.fd, descriptor)
+
+
+def _enqueue(logger, handlers):
+    """
+    Hand `logger`'s records to a queue rather than to `handlers`. A single
+    listener thread (shared by every logger) formats the records and
+    writes them, so lines never interleave and logging never blocks the
+    event loop.
+    """
+    import atexit
+    import logging.handlers
+    import queue
+
+    class QueueHandler(logging.handlers.QueueHandler):
+        """Enqueue records unformatted (the queue never leaves the
+        process, so formatting is left to the listener)."""
+
+        def prepare(self, record):
+            """Return `record` as is."""
+            return record
+
+    listener = getattr(_enqueue, 'listener', None)
+    if listener is None:
+        listener = logging.handlers.QueueListener(
+            queue.SimpleQueue(), respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        _enqueue.listener = listener
+
+    # the listener passes every record to every handler
+    for handler in handlers:
+        handler.addFilter(logging.Filter(logger.name))
+
+    listener.handlers += tuple(handlers)
+
+    logger.addHandler(QueueHandler(listener.queue))
+
+
+def _eventlogger(logfile=None, loglevel=logging.WARNING, loglimit=None):
+    """Configure event logger."""
+
+    eventlogger = logging.getLogger('event')
+
+    # ensure logger is not reconfigured
+    if not eventlogger.hasHandlers():
+
+        # set log level
+        eventlogger.setLevel(loglevel)
+
+        fmt = '[%(basename)s] %(levelname)s: %(message)s'
+
+        # configure terminal log
+        streamhandler = logging.StreamHandler()
+        streamhandler.setFormatter(logging.Formatter(fmt))
+        handlers = [streamhandler]
+
+        # configure log file (if necessary)
+        if logfile is not None:
+            fileformatter = logging.Formatter(
+                '%(asctime)s.%(msecs)03d ' + fmt,
+                '%Y-%m-%d %H:%M:%S')
+            filehandler = logging.FileHandler(logfile)
+            filehandler.setFormatter(fileformatter)
+            handlers.append(filehandler)
+
+        # truncate logged output
+        for handler in handlers:
+            handler.addFilter(_Output.Truncate(loglimit))
+
+        _enqueue(eventlogger, handlers)
+
+
+def _search(patterns, content):
+    """
+    Return the indices of the compiled `patterns` found in `content`.
+
+    Patterns are combined into a single alternation so that `content` is
+    scanned once for all of them. As a match hides any pattern overlapping
+    it, the patterns found are removed and the rest searched for again
+    until a scan finds nothing new.
+    """
+    import re
+
+    found = set()
+
+    # patterns with groups or global flags (set by an argument or inline,
+    # which is only permitted at the start of a pattern) cannot be combined
+    inline = re.compile(r'\(\?[aiLmsux]+\)' if isinstance(content, str)
+                        else rb'\(\?[aiLmsux]+\)')
+    combinable = []
+    for index, pattern in enumerate(patterns):
+        if pattern.groups or pattern.flags & ~(re.MULTILINE | re.UNICODE) \
+           or inline.match(pattern.pattern):
+            if pattern.search(content) is not None:
+                found.add(index)
+        else:
+            combinable.append(index)
+
+    while combinable:
+
+        try:
+            alternation = re.compile(
+                '|'.join('(%s)' % patterns[i].pattern for i in combinable)
+                if isinstance(content, str) else
+                b'|'.join(b'(%s)' % patterns[i].pattern
+                          for i in combinable),
+                re.MULTILINE)
+        except re.error:
+            # search for anything else that cannot be combined alone
+            found.update(i for i in combinable
+                         if patterns[i].search(content) is not None)
+            break
+
+        new = set()
+        for match in alternation.finditer(content):
+            new.add(combinable[match.lastindex - 1])
+            if len(new) == len(combinable):
+                break
+
+        if not new:
+            break
+
+        found |= new
+        combinable = [i for i in combinable if i not in new]
+
+    return found
+
+
+def _setstatus(path, old, new, attempts=3):
+    """
+    Atomically change the STATUS of an event file from `old` to `new`
+    and return whether it was changed.
+
+    The event file is locked (against other triggerd processes) while it
+    is read and replaced via a temporary file. Should the event file be
+    modified by anything else in the meantime, the update is retried.
+    """
+
+    import fcntl
+    import os
+    import re
+    import tempfile
+
+    pattern = re.compile(
+        br'^(\s*STATUS\s*=\s*)' + re.escape(old.encode()) +
+        br'(?=\s*(#.*)?$)', re.MULTILINE)
+
+    for _ in range(attempts):
+
+        with open(path, 'rb') as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+
+            # ensure the file was not replaced while awaiting the lock
+            stat = os.fstat(file.fileno())
+            if os.stat(path).st_ino != stat.st_ino:
+                continue
+
+            content, count = pattern.subn(
+                lambda m: m.group(1) + new.encode(), file.read(), 1)
+            if not count:
+                return False
+
+            descriptor, temporary = tempfile.mkstemp(
+                dir=os.path.dirname(os.path.abspath(path)),
+                prefix='.%s.' % os.path.basename(path))
+            try:
+                with os.fdopen(descriptor, 'wb') as output:
+                    output.write(content)
+                    output.flush()
+                    os.fsync(output.fileno())
+                os.chmod(temporary, stat.st_mode & 0o7777)
+
+                # ensure nothing else modified the file since it was read
+                current = os.stat(path)
+                if (current.st_ino, current.st_mtime_ns, current.st_size) != \
+                   (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+                    os.unlink(temporary)
+                    continue
+
+                os.replace(temporary, path)
+            except BaseException:
+                if os.path.exists(temporary):
+                    os.unlink(temporary)
+                raise
+
+            return True
+
+    return False
+
+
+def _getstatus(args, timeout=20):
+    """Execute bash command returning exit status."""
+    import asyncio
+
+    return asyncio.run(_agetstatus(args, timeout))
+
+
+async def _agetstatus(args, timeout=20, shell=None):
+    """Execute bash command asynchronously returning exit status."""
+
+    class Discard:
+        """Discard output (which is never decisive)."""
+        # pylint: disable=too-few-public-methods
+
+        @staticmethod
+        def feed(_):
+            """Discard a chunk of output."""
+            return False
+
+    status, _ = await _agetstatusoutput(args, timeout, matcher=Discard(),
+                                        shell=shell)
+    return status
+
+
+async def _agetstatusoutput(args, timeout=20, limit=None, matcher=None,
+                            shell=None, failed=None):
+    """
+    Execute bash command asynchronously returning status and output.
+
+    Output is read as it is produced. Beyond `limit` bytes it is
+    discarded (until EOF) rather than retained, and the command is left
+    to exit so that its status is its own. When a `matcher` is supplied,
+    output is fed to it rather than retained and the command is killed
+    as soon as the matcher's result is known. A
+    command that times out is killed and has status 124 (as with
+    timeout(1)). Commands that need a shell run on a worker of `shell`
+    (a _ShellPool) if there is one. As a status alone cannot tell a
+    command that failed to execute from one that exited with the same
+    status, `failed` (if supplied) is called with 'timeout' or 'spawn'
+    when the command timed out or could not be started.
+    """
+    import asyncio
+    import os
+    import signal
+
+    log = logging.getLogger(__program__)
+
+    try:
+        process = await _spawn(args, shell)
+    except FileNotFoundError:
+        log.error("Command not found executing '%s'", args)
+        if failed is not None:
+            failed('spawn')
+        return 127, ''
+    except PermissionError:
+        log.error("Permission denied executing '%s'", args)
+        if failed is not None:
+            failed('spawn')
+        return 126, ''
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    timedout = False
+
+    chunks = []
+    size = 0
+    truncated = False
+
+    async def read():
+        """Read output until EOF and return whether reading stopped early."""
+        nonlocal size, truncated
+
+        while True:
+            chunk = await process.stdout.read(65536)
+
+            if not chunk:
+                return False
+
+            # discard output beyond the limit
+            if truncated:
+                continue
+
+            if limit is not None and size + len(chunk) > limit:
+                chunk = chunk[:limit - size]
+                truncated = True
+                log.warning("Output of '%s' exceeded %s bytes (truncated)",
+                            args, limit)
+
+            size += len(chunk)
+
+            if matcher is None:
+                chunks.append(chunk)
+            elif matcher.feed(chunk):
+                log.debug("Result of '%s' known after %s bytes (stopping)",
+                          args, size)
+                return True
+
+    try:
+        stopped = await asyncio.wait_for(read(), timeout)
+        if not stopped:
+            await asyncio.wait_for(
+                process.wait(), max(deadline - loop.time(), 0))
+    except asyncio.TimeoutError:
+        log.error("Timed out executing '%s'", args)
+        stopped = timedout = True
+        if failed is not None:
+            failed('timeout')
+
+    if stopped:
+
+        # kill the command's process group (so that no pipeline member is
+        # left holding the output pipe open) and signal directly, as
+        # Process.kill() may reap an exited child itself
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+        # discard unread output so that the pipe can reach EOF
+        async def drain():
+            """Read and discard output until EOF."""
+            while await process.stdout.read(65536):
+                pass
+
+        try:
+            await asyncio.wait_for(drain(), 1)
+        except asyncio.TimeoutError:
+            pass
+
+        # await the exit status alone (Process.wait() also awaits EOF,
+        # which a process that left the group could withhold indefinitely)
+        while process.returncode is None:
+            await asyncio.sleep(0.01)
+
+    if isinstance(process, _ShellPool.Job):
+        process.close()
+
+    return 124 if timedout else process.returncode, \
+        b''.join(chunks).decode(errors='replace').strip()
+
+
+def _argv(command):
+    """
+    Split a command that needs no shell (a simple command without
+    expansions, redirections, globs or builtins) into its arguments, or
+    return None.
+    """
+    import shlex
+
+    if any(c in command for c in '\n|&;<>()$`\\*?[]{}~#!'):
+        return None
+
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return None
+
+    # leave assignments, keywords and builtins without an executable
+    # (e.g. `exit 1`) to the shell
+    if not argv or '=' in argv[0] or argv[0] in {
+            '.', ':', 'alias', 'bg', 'bind', 'break', 'builtin', 'caller',
+            'case', 'cd', 'command', 'compgen', 'complete', 'compopt',
+            'continue', 'coproc', 'declare', 'dirs', 'disown', 'do',
+            'done', 'elif', 'else', 'enable', 'esac', 'eval', 'exec',
+            'exit', 'export', 'fc', 'fg', 'fi', 'for', 'function',
+            'getopts', 'hash', 'help', 'history', 'if', 'jobs', 'let',
+            'local', 'logout', 'mapfile', 'popd', 'pushd', 'read',
+            'readarray', 'readonly', 'return', 'select', 'set', 'shift',
+            'shopt', 'source', 'suspend', 'then', 'time', 'times', 'trap',
+            'type', 'typeset', 'ulimit', 'umask', 'unalias', 'unset',
+            'until', 'wait', 'while'}:
+        return None
+
+    return argv
+
+
+def _getstatusoutput(args, timeout=20, limit=None, matcher=None,
+                     failed=None):
+    """Execute bash command returning output and exit status."""
+    import asyncio
+
+    return asyncio.run(_agetstatusoutput(args, timeout, limit, matcher,
+                                         failed=failed))
+
+
+def _globmatch(globs, name, relative):
+    """Check whether a file's name or relative path matches any glob."""
+    import fnmatch
+
+    return any(fnmatch.fnmatch(name, glob) or
+               fnmatch.fnmatch(relative, glob) for glob in globs)
+
+
+def _identity(path):
+    """Return the (inode, modification time, size) of a file, or None."""
+
+    import os
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _interval(value):
+    """Convert a duration (e.g. 90, 90s, 5m, 2h or 1d) to seconds."""
+
+    units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+    value = str(value).strip().lower()
+
+    multiplier = units.get(value[-1:])
+    if multiplier is not None:
+        value = value[:-1]
+    else:
+        multiplier = 1
+
+    seconds = int(value) * multiplier
+
+    if seconds <= 0:
+        raise ValueError('duration must be positive')
+
+    return seconds
+
+
+def _shard(relative, count):
+    """
+    Return the shard (1 to `count`) an event file is assigned to by
+    rendezvous hashing of its path relative to its target folder, so that
+    changing `count` moves as few event files as possible.
+    """
+
+    import hashlib
+
+    key = relative.encode(errors='surrogateescape')
+
+    return max(range(1, count + 1), key=lambda shard: hashlib.blake2b(
+        key, digest_size=8, salt=str(shard).encode()).digest())
+
+
+async def _spawn(args, shell=None):
+    """
+    Start a command, exec'ing it directly if it needs no shell, otherwise
+    on a worker of `shell` (a _ShellPool) or else on a new bash.
+    """
+    import asyncio
+    import errno
+    import subprocess
+
+    argv = _argv(args)
+    if argv is not None:
+        try:
+            return await asyncio.create_subprocess_exec(
+                *argv,
+                start_new_session=True,
+                stderr=subprocess.DEVNULL,
+                stdout=subprocess.PIPE)
+        except OSError as exc:
+            # leave scripts without a shebang to the shell (as bash does)
+            if exc.errno != errno.ENOEXEC:
+                raise
+
+    if shell is not None:
+        try:
+            return await shell.spawn(args)
+        except OSError as exc:
+            log = logging.getLogger(__program__)
+            log.warning("Falling back to a new shell for '%s' (%s)",
+                        args, exc)
+
+    return await asyncio.create_subprocess_shell(
+        args,
+        executable='bash',
+        start_new_session=True,
+        stderr=subprocess.DEVNULL,
+        stdout=subprocess.PIPE)
+
+
+def _truncate(text, limit):
+    """Shorten `text` to at most `limit` characters (noting how many were
+    dropped)."""
+
+    if len(text) <= limit:
+        return text
+
+    return '%s... (%s more characters)' % (text[:limit], len(text) - limit)
+
+
+def _normalize(command):
+    """
+    Normalize a COMMAND so that equivalent commands compare equal. The
+    result only identifies executions to share (the COMMAND itself is
+    what is executed).
+    """
+
+    import re
+
+    command = command.strip()
+
+    # collapse blanks unless they may be significant (never joining lines)
+    if not any(character in command for character in '\'"\\$`{'):
+        command = '\n'.join(re.sub(r'[ \t]+', ' ', line).strip(' \t')
+                            for line in command.split('\n'))
+
+    return command
+
+
+def _parse(path):
+    """
+    Parse a KEY=VALUE file into an EventRecord.
+
+    Values are read as ConfigObj would (with interpolation and list
+    values disabled), so an inline comment ends an unquoted value and
+    quotes are kept. Anything beyond flat KEY=VALUE lines (sections,
+    quoted keys, multiline values, byte order marks or lines ConfigObj
+    would reject) is left to ConfigObj itself, when it is installed.
+    """
+
+    import codecs
+    import re
+
+    try:
+        with open(path, 'rb') as file:
+            content = file.read()
+    except FileNotFoundError:
+        # like ConfigObj, treat a missing file as empty
+        return EventRecord()
+
+    try:
+        text = None if content.startswith((
+            codecs.BOM_UTF8, codecs.BOM_UTF16_BE, codecs.BOM_UTF16_LE)) \
+            else content.decode()
+    except UnicodeDecodeError:
+        text = None
+
+    if text is not None:
+
+        data = {}
+
+        for line in text.split('\n'):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            key, equals, value = line.partition('=')
+            key = key.rstrip()
+            if not equals or not key or key[0] in '[\'"' or key in data:
+                break
+
+            # only quoted values or inline comments need a closer look
+            value = value.lstrip()
+            if '#' in value or value.startswith(('"', "'")):
+                match = None if value.startswith(('"""', "'''")) else \
+                    re.match(r'^((?:".*?")|(?:\'.*?\')|(?:[^\'"#].*?)|(?:))'
+                             r'\s*(#.*)?$', value)
+                if match is None:
+                    break
+                value = match.group(1)
+
+            data[key] = value
+        else:
+            return EventRecord(data)
+
+    try:
+        import configobj
+    except ImportError:
+        raise ValueError("Unable to parse '%s' without configobj" %
+                         path) from None
+
+    return EventRecord(configobj.ConfigObj(
+        path, interpolation=False, list_values=False))
+
+
+def _parser(args, config):
+    """Parse script arguments and options."""
+    import argparse
+    import os
+
+    class SmartFormatter(argparse.HelpFormatter):
+        """Permit the use of raw text in help messages with 'r|' prefix."""
+
+        def _split_lines(self, text, width):
+            """argparse.RawTextHelpFormatter._split_lines"""
+            if text.startswith('r|'):
+                return text[2:].splitlines()
+            return argparse.HelpFormatter._split_lines(self, text, width)
+
+    # pylint: disable=too-few-public-methods
+    class NegateAction(argparse.Action):
+        """Support --toggle and --no-toggle options."""
+
+        def __call__(self, parser, namespace, values, option_string=None):
+            setattr(namespace, self.dest, option_string[2:4] != 'no')
+
+    def path(value):
+        """Ensure path is a directory or file-like object."""
+        if os.path.isdir(value):
+            return value
+
+        try:
+            with open(value) as file:
+                return file.name
+        except:
+            raise argparse.ArgumentTypeError(
+                "invalid path value: '%s'" % value)
+
+    def positive(value):
+        """Ensure value is a positive integer."""
+        try:
+            number = int(value)
+            assert number > 0
+        except (AssertionError, ValueError):
+            raise argparse.ArgumentTypeError(
+                "invalid positive integer value: '%s'" % value)
+        return number
+
+    def interval(value):
+        """Ensure value is a valid duration."""
+        try:
+            return _interval(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(
+                "invalid interval value: '%s'" % value)
+
+    def shard(value):
+        """Ensure value is a shard (i/N) and return (i, N)."""
+        try:
+            index, count = (int(n) for n in value.split('/'))
+            assert 1 <= index <= count
+        except (AssertionError, ValueError):
+            raise argparse.ArgumentTypeError(
+                "invalid shard value: '%s'" % value)
+        return index, count
+
+    parser = argparse.ArgumentParser(
+        add_help=False,
+        description=__description__,
+        formatter_class=SmartFormatter,
+        usage='%(prog)s [OPTION] <event files|folders>')
+    parser.add_argument(
+        '--deadline',
+        dest='deadline',
+        help='r|maximum duration of a run (or of each batch when\n'
+             'running as a daemon), after which remaining events\n'
+             'are skipped and running commands are killed',
+        metavar='SECONDS',
+        type=interval)
+    parser.add_argument(
+        '--exclude',
+        action='append',
+        dest='exclude',
+        help='r|skip event files and folders matching GLOB\n'
+             '(may be repeated)',
+        metavar='GLOB')
+    parser.add_argument(
+        '-f', '--file',
+        dest='config',
+        help='r|indicate trigger config file\n'
+             'Default: %s' % config,
+        type=argparse.FileType())
+    parser.add_argument(
+        '--cache', '--no-cache',
+        action=NegateAction,
+        default=True,
+        dest='cache',
+        help='cache parsed event files between runs (default)',
+        nargs=0)
+    parser.add_argument(
+        '--daemon',
+        action='store_true',
+        dest='daemon',
+        help='stay resident and execute events on their INTERVAL')
+    parser.add_argument(
+        '-h', '--help',
+        action='help',
+        help=argparse.SUPPRESS)
+    parser.add_argument(
+        '--include',
+        action='append',
+        dest='include',
+        help='r|only use event files matching GLOB (may be repeated)\n'
+             'Default: *.conf *.txt',
+        metavar='GLOB')
+    parser.add_argument(
+        '--interval',
+        default=60,
+        dest='interval',
+        help='r|default INTERVAL for events in daemon mode\n'
+             'Default: %(default)s seconds',
+        metavar='SECONDS',
+        type=interval)
+    parser.add_argument(
+        '-j', '--jobs',
+        default=32,
+        dest='jobs',
+        help='r|maximum number of events executed in parallel\n'
+             'Default: %(default)s',
+        metavar='N',
+        type=positive)
+    parser.add_argument(
+        '--max-output',
+        default=16777216,
+        dest='limit',
+        help='r|default MAX_OUTPUT (bytes read from each COMMAND)\n'
+             'Default: %(default)s',
+        metavar='BYTES',
+        type=positive)
+    parser.add_argument(
+        '--metrics',
+        dest='metrics',
+        help='r|write phase timings after each run to FILE\n'
+             '(Prometheus textfile if FILE ends with .prom, else JSON)',
+        metavar='FILE')
+    parser.add_argument(
+        '--max-backoff',
+        default=3600,
+        dest='backoff',
+        help='r|maximum delay before running an event whose COMMAND\n'
+             'keeps failing (timing out or not found) again\n'
+             'Default: %(default)s seconds',
+        metavar='SECONDS',
+        type=interval)
+    parser.add_argument(
+        '--max-depth',
+        dest='maxdepth',
+        help='descend at most N levels into event folders',
+        metavar='N',
+        type=positive)
+    parser.add_argument(
+        '--parallel', '--no-parallel',
+        action=NegateAction,
+        default=None,
+        dest='parallel',
+        help='execute events in parallel (default)',
+        nargs=0)
+    parser.add_argument(
+        '--shard',
+        default=os.environ.get('TRIGGERD_SHARD'),
+        dest='shard',
+        help='r|only execute the events assigned to shard I of N\n'
+             '(e.g. 2/3, default: $TRIGGERD_SHARD)',
+        metavar='I/N',
+        type=shard)
+    parser.add_argument(
+        '--state', '--no-state',
+        action=NegateAction,
+        default=True,
+        dest='state',
+        help='r|record the last run of every event and skip events\n'
+             'whose INTERVAL has not elapsed (default)',
+        nargs=0)
+    parser.add_argument(
+        '--timeout',
+        default=20,
+        dest='timeout',
+        help='r|default TIMEOUT (per COMMAND)\n'
+             'Default: %(default)s',
+        metavar='SECONDS',
+        type=interval)
+    parser.add_argument(
+        '--trigger-jobs',
+        default=8,
+        dest='trigger_jobs',
+        help='r|maximum number of triggers executed in parallel\n'
+             'Default: %(default)s',
+        metavar='N',
+        type=positive)
+    parser.add_argument(
+        '--trigger-timeout',
+        default=20,
+        dest='trigger_timeout',
+        help='r|default TRIGGER_TIMEOUT (per trigger attempt)\n'
+             'Default: %(default)s',
+        metavar='SECONDS',
+        type=interval)
+    parser.add_argument(
+        '--verify',
+        action='store_true',
+        dest='verify',
+        help='verify event files without execution')
+    parser.add_argument(
+        '--version',
+        action='version',
+        version='%(prog)s ' + __version__)
+
+    group = parser.add_argument_group('logging options')
+    group.add_argument(
+        '--debug',
+        action='store_true',
+        dest='debug',
+        help='set the logging level to debug')
+    group.add_argument(
+        '-l', '--log',
+        dest='logfile',
+        help='set log file destination')
+    group.add_argument(
+        '--log-output',
+        default=512,
+        dest='loglimit',
+        help='r|maximum number of output characters logged per test\n'
+             'Default: %(default)s',
+        metavar='N',
+        type=positive)
+    group.add_argument(
+        '--verbose',
+        action='store_true',
+        dest='verbose',
+        help='set the logging level to verbose')
+
+    parser.add_argument(
+        '--wait',
+        action='store_true',
+        dest='wait',
+        help='r|wait for a previous run of the same targets to finish\n'
+             '(rather than exit)')
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        dest='watch',
+        help='like --daemon but track changes to event folders')
+    parser.add_argument(
+        dest='targets',
+        help=argparse.SUPPRESS,
+        nargs='*',
         type=path)
 
     options = parser.parse_args(args)
@@ -671,7 +3935,7 @@ def _scriptlogger(logfile=None, loglevel=logging.WARNING):
         # configure terminal log
         streamhandler = logging.StreamHandler()
         streamhandler.setFormatter(logging.Formatter(fmt))
-        scriptlogger.addHandler(streamhandler)
+        handlers = [streamhandler]
 
         # configure log file (if necessary)
         if logfile is not None:
@@ -680,7 +3944,71 @@ def _scriptlogger(logfile=None, loglevel=logging.WARNING):
                 '%Y-%m-%d %H:%M:%S')
             filehandler = logging.FileHandler(logfile)
             filehandler.setFormatter(fileformatter)
-            scriptlogger.addHandler(filehandler)
+            handlers.append(filehandler)
+
+        _enqueue(scriptlogger, handlers)
+
+
+def _shardreport(targets, include=None, exclude=None, maxdepth=None,
+                 shard=(1, 1), state=None):
+    """
+    Log the number of event files assigned to every shard and the
+    expected duration of their COMMANDs (per the run state at `state`).
+    """
+
+    import os
+
+    log = logging.getLogger(__program__)
+
+    runs = RunState(state) if state is not None and os.path.exists(state) \
+        else None
+
+    # store the original log level
+    level = log.getEffectiveLevel()
+
+    # ensure the report is displayed
+    log.setLevel(logging.INFO)
+
+    for index in range(1, shard[1] + 1):
+        paths = generate_paths(targets, include, exclude, maxdepth,
+                               (index, shard[1]))
+        log.info("Shard %s/%s%s: %s events, %s", index, shard[1],
+                 ' (this shard)' if index == shard[0] else '', len(paths),
+                 'no recorded runs' if runs is None else
+                 '%.1f seconds expected' % sum(runs.expected(paths)))
+
+    # restore original log level
+    log.setLevel(level)
+
+
+def evaluate(paths, *, config=None, execute_triggers=False, jobs=32,
+             limit=16777216, output=512, timeout=20):
+    """
+    Evaluate event files (or folders of them) in-process and return an
+    EventResult for each, in order.
+
+    Triggers of matched events (defined in the trigger config file
+    `config`) are only executed, and their STATUS updated, if
+    `execute_triggers`. Otherwise event files are left untouched.
+    Messages go to the 'event' and 'triggerd' loggers as configured by
+    the caller (rather than to handlers set up for the command line). As
+    it runs an event loop of its own, call it from outside any running
+    event loop.
+    """
+
+    paths = list(iterate_paths(paths))
+
+    engine = _Evaluation(execute_triggers, output, config, jobs, limit,
+                         timeout=timeout)
+
+    results = []
+    for path, outcome in zip(paths, engine.run(paths)):
+        result = engine.results.get(path) or EventResult(path)
+        if isinstance(outcome, Exception):
+            result.error = outcome
+        results.append(result)
+
+    return results
 
 
 def eventhandler(paths,
@@ -688,73 +4016,148 @@ def eventhandler(paths,
                  verify=False,
                  logfile=None,
                  loglevel=logging.WARNING,
-                 parallel=False):
-    """Execute or verify event files."""
+                 parallel=False,
+                 daemon=False,
+                 interval=60,
+                 jobs=32,
+                 limit=16777216,
+                 index=None,
+                 watch=False,
+                 include=None,
+                 exclude=None,
+                 maxdepth=None,
+                 trigger_jobs=8,
+                 trigger_timeout=20,
+                 loglimit=None,
+                 metrics=None,
+                 timeout=20,
+                 deadline=None,
+                 state=None,
+                 backoff=3600,
+                 shard=None,
+                 lock=None):
+    """
+    Execute or verify event files. When watching, `paths` are the
+    targets (event files and folders) rather than the event files.
+    """
 
     # configure event logger
-    _eventlogger(logfile, loglevel)
+    _eventlogger(logfile, loglevel, loglimit)
 
-    if not verify and parallel:
+    # execute events one at a time unless running in parallel
+    jobs = jobs if parallel else 1
 
-        # from multiprocessing import Pool, cpu_count
-        import concurrent.futures
-        from multiprocessing import cpu_count
+    # load trigger definitions once for every event
+    triggers = TriggerRegistry(config)
 
-        workers = cpu_count()
+    # execute triggers apart from COMMANDs
+    pool = TriggerPool(trigger_jobs if parallel else 1, trigger_timeout)
 
-        # define in global namespace to ensure it can be pickled
-        global wrapper
+    # record phase timings (written to `metrics` after every run)
+    metrics = Metrics(metrics)
 
-        # use closure to permit use of wrapper with one argument
-        # DEBUG: ensure config is accessible during runtime
-        def wrapper(path):
-            EventRunner(path, config)
+    # record the last run of every event (to skip those not yet due)
+    state = None if state is None or verify else \
+        RunState(state, backoff, interval)
 
-        # pool = Pool(processes=workers)
-        # pool.map(wrapper, paths)
+    # lock events being evaluated (against other processes)
+    locks = None if lock is None or verify else _Lock(lock)
 
-        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
-            executor.map(wrapper, paths)
+    if verify:
 
-    else:
+        for path in paths:
+            EventVerifier(path, config, triggers)
 
-        action = EventVerifier if verify else EventRunner
+        triggers.report()
 
-        for path in paths:
-            action(path, config)
+    elif watch:
+
+        EventWatcher(paths, config, interval, jobs, limit, triggers,
+                     include, exclude, maxdepth, pool, metrics, timeout,
+                     deadline, state, shard, locks).run()
+
+    elif daemon:
+
+        EventScheduler(paths, config, interval, jobs, limit,
+                       triggers, pool, metrics, timeout, deadline,
+                       state, locks).run()
+
+    else:
 
+        EventEngine(config, jobs, limit,
+                    None if index is None else EventIndex(index),
+                    triggers, pool, metrics, timeout, deadline,
+                    state, locks=locks).run(paths)
 
-def generate_paths(paths):
+
+def generate_paths(paths, include=None, exclude=None, maxdepth=None,
+                   shard=None):
     """
     Iterates over `paths` (which may consist of files and/or directories)
     and return list of files.
     """
 
+    return list(iterate_paths(paths, include, exclude, maxdepth, shard))
+
+
+def iterate_paths(paths, include=None, exclude=None, maxdepth=None,
+                  shard=None):
+    """
+    Iterates over `paths` (which may consist of files and/or directories)
+    and lazily yield readable, writable and non-empty event files whose
+    name matches an `include` glob (and no `exclude` glob) within
+    `maxdepth` levels of each directory. Given a `shard` (index, count),
+    only event files assigned to that shard are yielded (see _shard).
+    """
+
     import os
-    import subprocess
 
-    files = []
+    include = include or ['*.conf', '*.txt']
+    exclude = exclude or []
+
+    def assigned(relative):
+        """Check whether an event file is assigned to the shard."""
+        return shard is None or _shard(relative, shard[1]) == shard[0]
+
+    def walk(top, directory, depth):
+        """Recursively yield event files beneath directory."""
+
+        try:
+            with os.scandir(directory) as iterator:
+                entries = sorted(iterator, key=lambda e: e.name)
+        except OSError:
+            return
+
+        for entry in entries:
+            relative = os.path.relpath(entry.path, top)
+
+            if _globmatch(exclude, entry.name, relative):
+                continue
+
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if maxdepth is None or depth < maxdepth:
+                        yield from walk(top, entry.path, depth + 1)
+                elif entry.is_file(follow_symlinks=False) and \
+                        _globmatch(include, entry.name, relative) and \
+                        assigned(relative) and \
+                        entry.stat(follow_symlinks=False).st_size and \
+                        os.access(entry.path, os.R_OK | os.W_OK):
+                    yield entry.path
+            except OSError:
+                continue
+
     for path in paths:
         if os.path.isdir(path):
-            files += sorted(subprocess.check_output(
-                ['find', path,
-                 '-type', 'f',
-                 '-readable',
-                 '-writable',
-                 '!', '-empty',
-                 '(', '-name', '*.conf', '-o', '-name', '*.txt', ')',
-                 '-print0'],
-                stderr=subprocess.DEVNULL,
-                universal_newlines=True).rstrip('\0').split('\0'))
-        else:
-            files.append(path)
-
-    return files
+            yield from walk(path, path, 1)
+        elif assigned(os.path.basename(path)):
+            yield path
 
 
 def main(args=None):
     """Start and configure application."""
 
+    import itertools
     import os
     import sys
 
@@ -763,6 +4166,11 @@ def main(args=None):
         os.path.join(os.environ.get('HOME'), '.config'),
         __program__, 'triggers.conf')
 
+    state = os.path.join(
+        os.environ.get('XDG_STATE_HOME') or
+        os.path.join(os.environ.get('HOME'), '.local', 'state'),
+        __program__)
+
     options, arguments = _parser(args, config)
 
     # determine trigger config file
@@ -777,31 +4185,108 @@ def main(args=None):
 
     log = logging.getLogger(__program__)
 
-    events = generate_paths(arguments)
+    events = iterate_paths(arguments,
+                           options.include,
+                           options.exclude,
+                           options.maxdepth,
+                           options.shard)
 
-    if not events:
+    # ensure there is at least one event (without walking every folder)
+    try:
+        events = itertools.chain([next(events)], events)
+    except StopIteration:
+        # a shard may be assigned none of the event files
+        events = [] if options.shard is not None and next(iterate_paths(
+            arguments, options.include, options.exclude,
+            options.maxdepth), None) else None
+
+    if events is None:
         log.error("You have not supplied any valid targets")
         log.error("Try '%s --help' for more information.", __program__)
         sys.exit(1)
+    elif options.verify and (options.daemon or options.watch):
+        log.warning("Ignoring use of '--%s' as it conflicts with "
+                    "verification", 'watch' if options.watch else 'daemon')
+        options.watch = False
     elif options.verify and options.parallel:
         log.warning("Ignoring use of '--parallel' as it may slow verification")
     elif not options.verify and options.parallel is None:
         options.parallel = True
 
-    log.info('processing %s events', len(events))
-    log.debug('events = %s', events)
+    # permit a single run of the same targets (and shard) at a time
+    if not options.verify:
+        runlock = _Lock(os.path.join(state, 'run.lock'))
+        offset = _Lock.offset(repr((
+            sorted(os.path.realpath(a) for a in arguments), options.shard)))
+        if not runlock.acquire(offset):
+            if not options.wait:
+                log.warning("Another run of %s is in progress (exiting)",
+                            ', '.join(arguments))
+                sys.exit(1)
+            log.info("Waiting for another run of %s to finish",
+                     ', '.join(arguments))
+            runlock.acquire(offset, True)
+
+    log.info('processing events in %s', ', '.join(arguments))
+    log.debug('include = %s', options.include)
+    log.debug('exclude = %s', options.exclude)
+    log.debug('maxdepth = %s', options.maxdepth)
     log.debug('verify = %s', options.verify)
     log.debug('triggerfile = %s', options.config)
     log.debug('logfile = %s', options.logfile)
     log.debug('loglevel = %s', options.loglevel)
+    log.debug('loglimit = %s', options.loglimit)
+    log.debug('metrics = %s', options.metrics)
+    log.debug('timeout = %s', options.timeout)
+    log.debug('deadline = %s', options.deadline)
+    log.debug('backoff = %s', options.backoff)
+    log.debug('shard = %s', options.shard)
+    log.debug('wait = %s', options.wait)
     log.debug('parallel = %s', options.parallel)
-
-    eventhandler(events,
+    log.debug('jobs = %s', options.jobs)
+    log.debug('trigger_jobs = %s', options.trigger_jobs)
+    log.debug('trigger_timeout = %s', options.trigger_timeout)
+    log.debug('limit = %s', options.limit)
+    log.debug('cache = %s', options.cache)
+    log.debug('state = %s', state if options.state else None)
+    log.debug('daemon = %s', options.daemon)
+    log.debug('interval = %s', options.interval)
+    log.debug('watch = %s', options.watch)
+
+    eventhandler(arguments if options.watch else events,
                  options.config,
                  options.verify,
                  options.logfile,
                  options.loglevel,
-                 options.parallel)
+                 options.parallel,
+                 options.daemon,
+                 options.interval,
+                 options.jobs,
+                 options.limit,
+                 os.path.join(state, 'index.db') if options.cache else None,
+                 options.watch,
+                 options.include,
+                 options.exclude,
+                 options.maxdepth,
+                 options.trigger_jobs,
+                 options.trigger_timeout,
+                 options.loglimit,
+                 options.metrics,
+                 options.timeout,
+                 options.deadline,
+                 os.path.join(state, 'state.db') if options.state else None,
+                 options.backoff,
+                 options.shard,
+                 os.path.join(state, 'events.lock'))
+
+    if options.verify and options.shard is not None:
+        _shardreport(arguments,
+                     options.include,
+                     options.exclude,
+                     options.maxdepth,
+                     options.shard,
+                     os.path.join(state, 'state.db') if options.state
+                     else None)
 
 
 if __name__ == '__main__':